@@ -0,0 +1,8 @@
+"""
+Offline benchmarks for Playlist Porter.
+
+Run a benchmark from the repository root, for example::
+
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_convert --tracks 1000 10000
+"""
@@ -0,0 +1,211 @@
+"""
+End-to-end conversion benchmark against fake Spotify and YouTube services.
+
+Drives the full pipeline (paged playlist fetch, match cache, quota account,
+batched search, duration checks) headlessly on synthetic playlists and
+reports throughput, per-track latency, peak memory and API calls. Nothing
+touches the network or real quota.
+
+Usage::
+
+    python -m benchmarks.bench_convert [--tracks 100 1000 10000 50000] [--latency 0.05]
+        [--error-rate 0.01] [--spotify-error-rate 0.01] [--quota-after 2000] [--no-retry]
+        [--no-verify] [--no-memory]
+
+Per-track latency runs from the moment a track comes off its Spotify page
+to the moment its result reaches the sink. Peak memory is measured with
+``tracemalloc``, which slows Python code down noticeably; pass
+``--no-memory`` for cleaner throughput numbers.
+"""
+
+import argparse
+import logging
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Optional
+
+from benchmarks.fakes import FakeSpotify, FakeYouTube
+from porter.cache import MatchCache
+from porter.converter import DEFAULT_BATCH_SIZE, convert_tracks
+from porter.quota import COSTS, QuotaLedger
+from porter.retry import CircuitBreaker, Retrier
+from porter.spotify import iter_playlist_entries
+from porter.telemetry import TELEMETRY
+from porter.youtube import DEFAULT_CONCURRENCY
+
+PLAYLIST_ID = "bench"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the nearest-rank ``pct`` percentile of ``values`` (0 if empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def run(
+    tracks: int,
+    latency: float = 0.05,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    quota_after: Optional[int] = None,
+    spotify_latency: float = 0.0,
+    spotify_error_rate: float = 0.0,
+    retry: bool = True,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    verify: bool = True,
+    cache: bool = False,
+    memory: bool = True,
+    seed: Optional[int] = 0,
+) -> Dict[str, Any]:
+    """
+    Convert one synthetic playlist and measure it.
+
+    Returns:
+        A dictionary with ``tracks``, ``seconds``, ``tracks_per_sec``,
+        ``p50_ms``, ``p99_ms``, ``peak_mb`` (None without ``memory``),
+        ``youtube_calls``, ``spotify_calls``, ``queued``, ``not_found``,
+        ``failed`` tracks, ``retries``, ``quota_units`` (what the YouTube
+        calls issued would have cost), ``telemetry`` (the run's
+        ``TELEMETRY.snapshot()``) and ``error`` (the exception that stopped
+        the run, if any)
+    """
+    youtube = FakeYouTube(
+        latency=latency, jitter=jitter, error_rate=error_rate, quota_after=quota_after, seed=seed
+    )
+    sp = FakeSpotify(tracks_per_playlist=tracks, latency=spotify_latency, error_rate=spotify_error_rate, seed=seed)
+    youtube_retry = Retrier("YouTube", base_delay=0.05, breaker=CircuitBreaker("YouTube")) if retry else None
+    spotify_retry = Retrier("Spotify", base_delay=0.05, breaker=CircuitBreaker("Spotify")) if retry else None
+    ledger = QuotaLedger(":memory:", daily_limit=10**12)
+    match_cache = MatchCache(":memory:") if cache else None
+
+    started: Dict[str, float] = {}
+    latencies: List[float] = []
+
+    def _source() -> Iterator[Dict[str, Any]]:
+        for _, track in iter_playlist_entries(sp, PLAYLIST_ID, retry=spotify_retry):
+            started[track["id"]] = time.perf_counter()
+            yield track
+
+    def _progress(done: int, row: Dict[str, Any]) -> None:
+        latencies.append(time.perf_counter() - started.pop(row["track_id"]))
+
+    TELEMETRY.reset()
+    if memory:
+        tracemalloc.start()
+    queued = not_found = failed = count = 0
+    error = None
+    start = time.perf_counter()
+    try:
+        for row in convert_tracks(
+            youtube,
+            _source(),
+            cache=match_cache,
+            quota=ledger.account("bench"),
+            concurrency=concurrency,
+            batch_size=batch_size,
+            verify=verify,
+            retry=youtube_retry,
+            on_progress=_progress,
+        ):
+            count += 1
+            queued += row["queued"]
+            failed += row["failed"]
+            not_found += not (row["queued"] or row["failed"] or row["video_id"])
+    except Exception as exc:
+        error = exc
+    elapsed = time.perf_counter() - start
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "tracks": count,
+        "seconds": elapsed,
+        "tracks_per_sec": count / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_mb": peak / 2**20 if peak is not None else None,
+        "youtube_calls": dict(youtube.calls),
+        "youtube_errors": dict(youtube.errors),
+        "spotify_calls": dict(sp.calls),
+        "queued": queued,
+        "not_found": not_found,
+        "failed": failed,
+        "retries": sum(r.retries for r in (youtube_retry, spotify_retry) if r is not None),
+        "quota_units": sum(COSTS.get(method, 0) * n for method, n in youtube.calls.items()),
+        "telemetry": TELEMETRY.snapshot(),
+        "error": error,
+    }
+
+
+def _calls(calls: Dict[str, int]) -> str:
+    return ", ".join(f"{method} {n}" for method, n in sorted(calls.items())) or "none"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tracks", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake YouTube round trip")
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency spread as a fraction of it")
+    parser.add_argument("--spotify-latency", type=float, default=0.02, help="seconds per fake Spotify call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="chance a YouTube call fails with a 503")
+    parser.add_argument("--spotify-error-rate", type=float, default=0.0, help="chance a Spotify call gets a 429")
+    parser.add_argument("--no-retry", action="store_true", help="no retries or circuit breakers")
+    parser.add_argument("--quota-after", type=int, default=None, help="searches before quotaExceeded")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--no-verify", action="store_true", help="skip the videos.list duration check")
+    parser.add_argument("--cache", action="store_true", help="use an in-memory match cache")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc peak memory tracking")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    # the quota warnings repeat for every batch in flight when --quota-after trips
+    logging.getLogger("porter").setLevel(logging.ERROR)
+
+    print(
+        f"YouTube {args.latency * 1000:.0f} ms ±{args.jitter:.0%}, Spotify {args.spotify_latency * 1000:.0f} ms, "
+        f"concurrency {args.concurrency}, batch {args.batch_size}, verify {'off' if args.no_verify else 'on'}, "
+        f"error rate {args.error_rate:.1%}, quota after {args.quota_after or 'never'}"
+    )
+    for tracks in args.tracks:
+        result = run(
+            tracks,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            quota_after=args.quota_after,
+            spotify_latency=args.spotify_latency,
+            spotify_error_rate=args.spotify_error_rate,
+            retry=not args.no_retry,
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+            verify=not args.no_verify,
+            cache=args.cache,
+            memory=not args.no_memory,
+            seed=args.seed,
+        )
+        peak = f"{result['peak_mb']:7.1f} MB" if result["peak_mb"] is not None else "      n/a"
+        print(
+            f"{tracks:>6} tracks: {result['tracks_per_sec']:8.1f} tracks/sec, "
+            f"p50 {result['p50_ms']:7.1f} ms, p99 {result['p99_ms']:7.1f} ms, peak {peak}, "
+            f"{result['queued']} queued, {result['not_found']} not found, {result['failed']} failed, "
+            f"{result['retries']} retries, {result['quota_units']} quota units"
+        )
+        print(f"         YouTube calls: {_calls(result['youtube_calls'])}; errors: {_calls(result['youtube_errors'])}")
+        print(f"         Spotify calls: {_calls(result['spotify_calls'])}")
+        for call in result["telemetry"]:
+            print(
+                f"         {call['operation']} {call['call']}: {call['count']} calls, {call['total_s']:.2f}s, "
+                f"p50 {call['p50_ms']:.1f} ms, p95 {call['p95_ms']:.1f} ms, {call['bytes'] / 1024:.0f} KiB"
+            )
+        if result["error"] is not None:
+            print(f"         stopped after {result['tracks']} tracks: {result['error']}")
+
+
+if __name__ == "__main__":
+    main()
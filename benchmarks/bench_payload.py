@@ -0,0 +1,56 @@
+"""
+Measure Spotify playlist page size with and without a ``fields`` projection.
+
+Pages come from the fake Spotify client serving full Web API track objects,
+serialized to JSON the way they would arrive over the wire.
+
+Usage::
+
+    python -m benchmarks.bench_payload [--tracks 1000]
+"""
+
+import argparse
+import json
+import time
+from typing import Optional
+
+from benchmarks.fakes import FakeSpotify
+from porter.spotify import ADDITIONAL_TYPES, PAGE_SIZE, PLAYLIST_ITEM_FIELDS
+
+
+def measure(tracks: int, fields: Optional[str]) -> dict:
+    """Return bytes per track and JSON decode time per track for one layout."""
+    sp = FakeSpotify(tracks_per_playlist=tracks, full_objects=True)
+    bodies = [
+        json.dumps(
+            sp.playlist_items("bench", fields=fields, limit=PAGE_SIZE, offset=offset,
+                              additional_types=ADDITIONAL_TYPES)
+        ).encode()
+        for offset in range(0, tracks, PAGE_SIZE)
+    ]
+    start = time.perf_counter()
+    for body in bodies:
+        json.loads(body)
+    decode = time.perf_counter() - start
+    return {
+        "bytes_per_track": sum(map(len, bodies)) / tracks,
+        "decode_us_per_track": decode / tracks * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=1000)
+    args = parser.parse_args()
+
+    full = measure(args.tracks, None)
+    trimmed = measure(args.tracks, PLAYLIST_ITEM_FIELDS)
+    print(f"{args.tracks} tracks")
+    for name, result in (("full objects", full), ("fields projection", trimmed)):
+        print(f"  {name:<18} {result['bytes_per_track']:8.0f} bytes/track"
+              f"  {result['decode_us_per_track']:6.1f} us/track to decode")
+    print(f"  {full['bytes_per_track'] / trimmed['bytes_per_track']:.1f}x fewer bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Benchmark concurrent YouTube search fan-out against a fake client.
+
+Usage::
+
+    python -m benchmarks.bench_search [--tracks 300] [--latency 0.05] [--batch-size 1 10]
+"""
+
+import argparse
+import time
+
+from benchmarks.fakes import FakeYouTube, fake_tracks
+from porter.converter import convert_tracks
+
+
+def run(tracks: int, latency: float, concurrency: int, batch_size: int = 1) -> float:
+    """Convert ``tracks`` fake tracks and return tracks per second."""
+    youtube = FakeYouTube(latency=latency)
+    playlist = fake_tracks(tracks)
+    start = time.perf_counter()
+    rows = list(convert_tracks(youtube, playlist, concurrency=concurrency, batch_size=batch_size))
+    elapsed = time.perf_counter() - start
+    assert [r["track_id"] for r in rows] == [t["id"] for t in playlist], "results out of playlist order"
+    return tracks / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake round trip")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1])
+    args = parser.parse_args()
+
+    print(f"{args.tracks} tracks, {args.latency * 1000:.0f} ms per round trip")
+    for batch_size in args.batch_size:
+        for concurrency in args.concurrency:
+            rate = run(args.tracks, args.latency, concurrency, batch_size)
+            print(f"  batch {batch_size:>2}, concurrency {concurrency:>3}: {rate:8.1f} tracks/sec")
+
+
+if __name__ == "__main__":
+    main()
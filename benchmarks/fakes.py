@@ -0,0 +1,409 @@
+"""
+Local stand-ins for the YouTube Data API and Spotify Web API clients.
+
+These mimic just enough of the ``googleapiclient`` resource and ``spotipy``
+client interfaces for the converter to run against them without network
+access or API quota. The YouTube fake can also inject transient errors and
+quota errors to exercise the failure paths.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class _FakeResponse:
+    """The parts of an ``httplib2`` response that error handling looks at."""
+
+    def __init__(self, status: int, reason: str = ""):
+        self.status = status
+        self.reason = reason
+
+
+class FakeHttpError(Exception):
+    """Stand-in for ``googleapiclient.errors.HttpError`` (same ``resp``/``content`` shape)."""
+
+    def __init__(self, status: int, reason: str):
+        self.resp = _FakeResponse(status, reason)
+        self.content = json.dumps(
+            {"error": {"code": status, "errors": [{"reason": reason}], "message": reason}}
+        ).encode()
+        super().__init__(f"<HttpError {status}: {reason}>")
+
+
+class FakeSpotifyError(Exception):
+    """Stand-in for ``spotipy.SpotifyException`` (same ``http_status``/``headers`` shape)."""
+
+    def __init__(self, http_status: int, retry_after: Optional[float] = None):
+        self.http_status = http_status
+        self.headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+        super().__init__(f"http status: {http_status}")
+
+
+class _FakeRequest:
+    """A prepared request; ``execute`` sleeps, then returns a canned response or raises."""
+
+    def __init__(self, service: "FakeYouTube", method: str, respond: Callable[[], Dict[str, Any]]):
+        self._service = service
+        self._method = method
+        self._respond = respond
+        self.methodId = f"youtube.{method}"
+
+    def _run(self) -> Dict[str, Any]:
+        self._service._count(self._method)
+        self._service._maybe_fail(self._method)
+        return self._respond()
+
+    def execute(self, http: Any = None, num_retries: int = 0) -> Dict[str, Any]:
+        self._service._sleep()
+        return self._run()
+
+
+class _FakeBatch:
+    """A multipart batch: one sleep for the whole round trip, then every callback."""
+
+    def __init__(self, service: "FakeYouTube", callback: Optional[Callable[..., None]]):
+        self._service = service
+        self._callback = callback
+        self._parts: List[Any] = []
+
+    def add(self, request: _FakeRequest, callback: Optional[Callable[..., None]] = None,
+            request_id: Optional[str] = None) -> None:
+        self._parts.append((request, callback or self._callback, request_id or str(len(self._parts))))
+
+    def execute(self, http: Any = None) -> None:
+        self._service._count("batch")
+        self._service._sleep()
+        for request, callback, request_id in self._parts:
+            try:
+                response = request._run()
+            except FakeHttpError as exc:
+                callback(request_id, None, exc)
+            else:
+                callback(request_id, response, None)
+
+
+class _FakeVideos:
+    def __init__(self, service: "FakeYouTube"):
+        self._service = service
+
+    def list(self, id: str = "", **kwargs: Any) -> _FakeRequest:
+        ids = id.split(",")
+        return _FakeRequest(self._service, "videos.list", lambda: self._service.videos_response(ids))
+
+
+class _FakeSearch:
+    def __init__(self, service: "FakeYouTube"):
+        self._service = service
+
+    def list(self, q: str = "", maxResults: int = 5, **kwargs: Any) -> _FakeRequest:
+        return _FakeRequest(self._service, "search.list", lambda: self._service.search_response(q, maxResults))
+
+
+class FakeYouTube:
+    """
+    Fake YouTube Data API resource.
+
+    Every search returns deterministic video IDs derived from the query after
+    sleeping for ``latency`` seconds, roughly like a real round trip.
+    ``calls`` counts executed requests per method (batch parts included)
+    and ``"batch"`` round trips.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        quota_after: Optional[int] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initialize the fake client.
+
+        Args:
+            latency: Seconds each ``execute()`` call sleeps
+            jitter: Random spread of the latency, as a fraction of it
+                (0.5 sleeps between 0.5x and 1.5x ``latency``)
+            error_rate: Probability that a request (or batch part) fails
+                with a transient 503 error
+            quota_after: Number of ``search.list`` calls served before every
+                further call fails with ``quotaExceeded``; None for no limit
+            seed: Seed for the jitter and error draws
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.quota_after = quota_after
+        self.calls: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _count(self, method: str) -> None:
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+
+    def _sleep(self) -> None:
+        if not self.latency:
+            return
+        delay = self.latency
+        if self.jitter:
+            with self._lock:
+                delay *= 1 + self._random.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, delay))
+
+    def _maybe_fail(self, method: str) -> None:
+        with self._lock:
+            if method == "search.list" and self.quota_after is not None and self.calls[method] > self.quota_after:
+                error = FakeHttpError(403, "quotaExceeded")
+            elif self.error_rate and self._random.random() < self.error_rate:
+                error = FakeHttpError(503, "backendError")
+            else:
+                return
+            self.errors[error.resp.reason] = self.errors.get(error.resp.reason, 0) + 1
+        raise error
+
+    def search(self) -> _FakeSearch:
+        return _FakeSearch(self)
+
+    def videos(self) -> _FakeVideos:
+        return _FakeVideos(self)
+
+    def new_batch_http_request(self, callback: Optional[Callable[..., None]] = None) -> _FakeBatch:
+        return _FakeBatch(self, callback)
+
+    def search_response(self, query: str, max_results: int = 1) -> Dict[str, Any]:
+        return {
+            "items": [
+                {"id": {"kind": "youtube#video", "videoId": fake_video_id(query, rank)}}
+                for rank in range(max_results)
+            ]
+        }
+
+    def videos_response(self, ids: List[str]) -> Dict[str, Any]:
+        return {
+            "items": [
+                {"id": video_id, "contentDetails": {"duration": f"PT{fake_duration(video_id)}S"}}
+                for video_id in ids
+            ]
+        }
+
+
+def fake_duration(video_id: str) -> int:
+    """Return a stable pseudo duration in seconds (2 to 7 minutes) for a video."""
+    return 120 + int(hashlib.sha1(video_id.encode()).hexdigest()[:6], 16) % 300
+
+
+def fake_video_id(query: str, rank: int = 0) -> str:
+    """Return a stable 11-character pseudo video ID for a query."""
+    return hashlib.sha1(f"{query}#{rank}".encode()).hexdigest()[:11]
+
+
+def fake_tracks(count: int) -> List[Dict[str, Any]]:
+    """Build ``count`` distinct synthetic Spotify track objects."""
+    return [
+        {
+            "id": f"track{i:022d}",
+            "name": f"Song {i}",
+            "artists": [{"name": f"Artist {i % 97}"}],
+            "duration_ms": 180_000 + (i % 120) * 1000,
+        }
+        for i in range(count)
+    ]
+
+
+def fake_queries(count: int, prefix: Optional[str] = None) -> list:
+    """Build ``count`` distinct synthetic "title artist" queries."""
+    prefix = prefix or "Song"
+    return [f"{prefix} {i} Artist {i % 97}" for i in range(count)]
+
+
+# Roughly what Spotify returns for available_markets on a widely released track
+_MARKETS = [f"{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(185)]
+
+
+def full_track(track: Dict[str, Any]) -> Dict[str, Any]:
+    """Expand a minimal synthetic track into a full Web API track object."""
+    track_id = track["id"]
+    artists = [
+        {
+            "external_urls": {"spotify": f"https://open.spotify.com/artist/{a['name'].replace(' ', '')}"},
+            "href": f"https://api.spotify.com/v1/artists/{a['name'].replace(' ', '')}",
+            "id": a["name"].replace(" ", ""),
+            "name": a["name"],
+            "type": "artist",
+            "uri": f"spotify:artist:{a['name'].replace(' ', '')}",
+        }
+        for a in track["artists"]
+    ]
+    return {
+        **track,
+        "album": {
+            "album_type": "album",
+            "artists": artists,
+            "available_markets": _MARKETS,
+            "external_urls": {"spotify": f"https://open.spotify.com/album/{track_id[::-1]}"},
+            "href": f"https://api.spotify.com/v1/albums/{track_id[::-1]}",
+            "id": track_id[::-1],
+            "images": [
+                {"height": size, "url": f"https://i.scdn.co/image/ab67616d0000b273{track_id}{size}", "width": size}
+                for size in (640, 300, 64)
+            ],
+            "name": f"Album for {track['name']}",
+            "release_date": "2011-01-01",
+            "release_date_precision": "day",
+            "total_tracks": 12,
+            "type": "album",
+            "uri": f"spotify:album:{track_id[::-1]}",
+        },
+        "artists": artists,
+        "available_markets": _MARKETS,
+        "disc_number": 1,
+        "episode": False,
+        "explicit": False,
+        "external_ids": {"isrc": f"USRC1{track_id[-7:]}"},
+        "external_urls": {"spotify": f"https://open.spotify.com/track/{track_id}"},
+        "href": f"https://api.spotify.com/v1/tracks/{track_id}",
+        "is_local": False,
+        "popularity": 50,
+        "preview_url": None,
+        "track": True,
+        "track_number": 1,
+        "type": "track",
+        "uri": f"spotify:track:{track_id}",
+    }
+
+
+def _parse_fields(fields: str) -> Dict[str, Any]:
+    """Parse a Web API ``fields`` filter like ``a,b(c,d(e))`` into a tree."""
+    tree: Dict[str, Any] = {}
+    stack = [tree]
+    name = ""
+    for char in fields + ",":
+        if char == "(":
+            stack[-1][name] = {}
+            stack.append(stack[-1][name])
+            name = ""
+        elif char in ",)":
+            if name:
+                stack[-1][name] = None
+            name = ""
+            if char == ")":
+                stack.pop()
+        else:
+            name += char.strip()
+    return tree
+
+
+def apply_fields(obj: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    """Keep only the parts of ``obj`` selected by a parsed ``fields`` tree."""
+    if tree is None:
+        return obj
+    if isinstance(obj, list):
+        return [apply_fields(item, tree) for item in obj]
+    if isinstance(obj, dict):
+        return {key: apply_fields(obj[key], sub) for key, sub in tree.items() if key in obj}
+    return obj
+
+
+class FakeSpotify:
+    """
+    Fake ``spotipy.Spotify`` client serving synthetic playlists.
+
+    Playlists are created on first use with ``tracks_per_playlist`` tracks;
+    ``playlists`` can be filled in directly for custom content.
+    """
+
+    def __init__(
+        self,
+        tracks_per_playlist: int = 300,
+        latency: float = 0.0,
+        full_objects: bool = False,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initialize the fake client.
+
+        Args:
+            tracks_per_playlist: Size of each auto-created playlist
+            latency: Seconds each call sleeps
+            full_objects: Serve full Web API track objects (honouring any
+                ``fields`` filter) instead of the minimal synthetic ones
+            error_rate: Probability that a call fails with a 429 carrying
+                ``Retry-After: 0``
+            seed: Seed for the error draws
+        """
+        self.tracks_per_playlist = tracks_per_playlist
+        self.latency = latency
+        self.full_objects = full_objects
+        self.error_rate = error_rate
+        self.errors = 0
+        self._random = random.Random(seed)
+        self.playlists: Dict[str, List[Dict[str, Any]]] = {}
+        self.snapshots: Dict[str, str] = {}
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _call(self, method: str) -> None:
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            failed = bool(self.error_rate) and self._random.random() < self.error_rate
+            self.errors += failed
+        if self.latency:
+            time.sleep(self.latency)
+        if failed:
+            raise FakeSpotifyError(429, retry_after=0)
+
+    def _tracks(self, playlist_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            if playlist_id not in self.playlists:
+                self.playlists[playlist_id] = fake_tracks(self.tracks_per_playlist)
+            return self.playlists[playlist_id]
+
+    def playlist(self, playlist_id: str, fields: Optional[str] = None, **kwargs: Any) -> Dict[str, Any]:
+        self._call("playlist")
+        tracks = self._tracks(playlist_id)
+        return {"id": playlist_id, "snapshot_id": self.snapshots.get(playlist_id, "snap-1"),
+                "tracks": {"total": len(tracks)}}
+
+    def playlist_items(self, playlist_id: str, fields: Optional[str] = None, limit: int = 100,
+                       offset: int = 0, **kwargs: Any) -> Dict[str, Any]:
+        self._call("playlist_items")
+        tracks = self._tracks(playlist_id)
+        items = [
+            {
+                "added_at": "2024-01-01T00:00:00Z",
+                "added_by": {"id": "someone", "type": "user", "uri": "spotify:user:someone"},
+                "is_local": False,
+                "primary_color": None,
+                "item": full_track(track) if self.full_objects else track,
+            }
+            for track in tracks[offset:offset + limit]
+        ]
+        more = offset + limit < len(tracks)
+        page = {"href": f"https://api.spotify.com/v1/playlists/{playlist_id}/tracks",
+                "items": items, "total": len(tracks), "offset": offset, "limit": limit, "previous": None,
+                "next": f"items:{playlist_id}:{offset + limit}:{limit}" if more else None}
+        return apply_fields(page, _parse_fields(fields)) if fields else page
+
+    def current_user_playlists(self, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        self._call("current_user_playlists")
+        ids = sorted(self.playlists)
+        items = [{"id": pid, "name": f"Playlist {pid}", "tracks": {"total": len(self.playlists[pid])}}
+                 for pid in ids[offset:offset + limit]]
+        more = offset + limit < len(ids)
+        return {"items": items, "total": len(ids), "offset": offset, "limit": limit,
+                "next": f"mine::{offset + limit}:{limit}" if more else None}
+
+    def next(self, page: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not page.get("next"):
+            return None
+        kind, playlist_id, offset, limit = page["next"].split(":")
+        if kind == "mine":
+            return self.current_user_playlists(limit=int(limit), offset=int(offset))
+        return self.playlist_items(playlist_id, limit=int(limit), offset=int(offset))
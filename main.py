@@ -1,11 +1,30 @@
 import streamlit as st
 import pandas as pd
+import io
+import logging
 import os
+import time
 from dotenv import load_dotenv
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 from spotipy.cache_handler import MemoryCacheHandler
 from googleapiclient.discovery import build
+from googleapiclient.http import build_http
+
+from porter import (DEFAULT_CONCURRENCY, TELEMETRY, CheckpointStore, CircuitBreaker, JobManager, KeyPool, MatchCache,
+                    MatchIndex, QuotaLedger, Retrier, TrackListCache, convert_playlist, convert_playlists,
+                    iter_user_playlists, load_api_keys, parse_playlist_id, playlist_links)
+from porter.cache import DEFAULT_CACHE_PATH, DEFAULT_MAX_ENTRIES
+from porter.checkpoint import DEFAULT_CHECKPOINT_DIR
+from porter.converter import DEFAULT_BATCH_SIZE as DEFAULT_SEARCH_BATCH_SIZE, DEFAULT_VERIFY_CONCURRENCY
+from porter.index import DEFAULT_INDEX_PATH, DEFAULT_THRESHOLD as DEFAULT_INDEX_THRESHOLD
+from porter.export import FORMATS as EXPORT_FORMATS, export_rows, row_link
+from porter.jobs import DEFAULT_MAX_JOBS, FAILED
+from porter.quota import DEFAULT_DAILY_QUOTA, DEFAULT_LEDGER_PATH
+from porter.render import DEFAULT_BATCH_SIZE, DEFAULT_FLUSH_INTERVAL, RowBatcher
+from porter.spotify import DEFAULT_PAGE_CONCURRENCY
+
+logger = logging.getLogger(__name__)
 
 # --- INITIAL SETUP For env---
 if os.path.exists(".env"):
@@ -14,12 +33,324 @@ if os.path.exists(".env"):
 # .strip() handles any accidental spaces in Railway dashboard
 SP_ID = os.getenv("SPOTIPY_CLIENT_ID", "").strip()
 SP_SECRET = os.getenv("SPOTIPY_CLIENT_SECRET", "").strip()
-YT_KEY = os.getenv("YOUTUBE_API_KEY", "").strip()
+# More keys can go in YOUTUBE_API_KEYS (comma separated) or a file named by YOUTUBE_API_KEYS_FILE,
+# searches then go to whichever key has the most quota left
+YT_KEYS = load_api_keys(os.environ)
+YT_KEY = YT_KEYS[0] if YT_KEYS else ""
 REDIRECT_URI = os.getenv("REDIRECT_URI", "http://127.0.0.1:8501/").strip()
+# How many Spotify playlist pages get fetched at once
+SPOTIFY_PAGE_CONCURRENCY = int(os.getenv("SPOTIFY_PAGE_CONCURRENCY", DEFAULT_PAGE_CONCURRENCY))
+# How many YouTube searches run at once during a conversion
+SEARCH_CONCURRENCY = int(os.getenv("YOUTUBE_SEARCH_CONCURRENCY", DEFAULT_CONCURRENCY))
+# Searches sent together in one batch request (1 = no batching)
+SEARCH_BATCH_SIZE = int(os.getenv("YOUTUBE_BATCH_SIZE", DEFAULT_SEARCH_BATCH_SIZE))
+# Check the top few search hits against the song length so live versions and 10 hour loops get skipped.
+# Costs 1 unit per batch on top of the 100 per search
+VERIFY_DURATIONS = os.getenv("VERIFY_DURATIONS", "1").strip().lower() not in ("0", "false", "no", "")
+# Threads checking durations, runs alongside the searches
+VERIFY_CONCURRENCY = int(os.getenv("VERIFY_CONCURRENCY", DEFAULT_VERIFY_CONCURRENCY))
+# Local file of past track -> video matches, shared by everyone using this server
+MATCH_CACHE_PATH = os.getenv("MATCH_CACHE_PATH", DEFAULT_CACHE_PATH).strip()
+MATCH_CACHE_TTL_DAYS = float(os.getenv("MATCH_CACHE_TTL_DAYS", 30))
+MATCH_CACHE_MAX_ENTRIES = int(os.getenv("MATCH_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+# Fuzzy index of past matches, so a re-release or respelled copy of a known song costs no search.
+# Higher threshold = stricter, 1 only reuses near identical titles
+MATCH_INDEX_PATH = os.getenv("MATCH_INDEX_PATH", DEFAULT_INDEX_PATH).strip()
+MATCH_INDEX_THRESHOLD = float(os.getenv("MATCH_INDEX_THRESHOLD", DEFAULT_INDEX_THRESHOLD))
+# Daily YouTube quota per key, spent units are tracked so we stop before google cuts us off
+YT_DAILY_QUOTA = int(os.getenv("YOUTUBE_DAILY_QUOTA", DEFAULT_DAILY_QUOTA))
+QUOTA_LEDGER_PATH = os.getenv("QUOTA_LEDGER_PATH", DEFAULT_LEDGER_PATH).strip()
+# How long a key rests after google says quotaExceeded, empty = until the daily reset
+QUOTA_COOLDOWN_SECONDS = float(os.getenv("QUOTA_COOLDOWN_SECONDS") or 0) or None
+# Fetched playlist track lists are kept in memory up to this size, keyed by snapshot so edits are picked up
+PLAYLIST_CACHE_MB = float(os.getenv("PLAYLIST_CACHE_MB", 64))
+# Progress of every conversion is saved here so an interrupted one picks up where it stopped
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", DEFAULT_CHECKPOINT_DIR).strip()
+# Results table gets new rows in batches instead of being redrawn for every track
+TABLE_BATCH_SIZE = int(os.getenv("TABLE_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+TABLE_FLUSH_SECONDS = float(os.getenv("TABLE_FLUSH_SECONDS", DEFAULT_FLUSH_INTERVAL))
+# Conversions run in the background so a rerun or refresh doesn't kill them
+MAX_JOBS = int(os.getenv("MAX_CONVERSION_JOBS", DEFAULT_MAX_JOBS))
+JOB_POLL_SECONDS = 0.5
+# Call timings for dashboards in prometheus text format, written to a file and/or served on /metrics at this port
+METRICS_FILE = os.getenv("METRICS_FILE", "").strip()
+METRICS_FILE_INTERVAL = float(os.getenv("METRICS_FILE_INTERVAL", 15))
+METRICS_PORT = int(os.getenv("METRICS_PORT") or 0)
 
 st.set_page_config(page_title="Playlist Porter", page_icon="🎵")
 st.title("🎵 Playlist Porter")
 
+
+# One cache for the whole process so every session benefits from past searches
+@st.cache_resource
+def get_match_cache():
+    return MatchCache(MATCH_CACHE_PATH, ttl=MATCH_CACHE_TTL_DAYS * 24 * 3600, max_entries=MATCH_CACHE_MAX_ENTRIES)
+
+
+# read in the background so the first page load doesn't wait for it
+@st.cache_resource
+def get_match_index():
+    index = MatchIndex(MATCH_INDEX_PATH, threshold=MATCH_INDEX_THRESHOLD, ttl=MATCH_CACHE_TTL_DAYS * 24 * 3600,
+                       max_entries=MATCH_CACHE_MAX_ENTRIES)
+    index.preload()
+    return index
+
+
+@st.cache_resource
+def get_quota_ledger():
+    return QuotaLedger(QUOTA_LEDGER_PATH, daily_limit=YT_DAILY_QUOTA)
+
+
+# Built once per process from the discovery doc bundled with google-api-python-client, no network fetch.
+# Safe to share since every request is executed on the worker's own http object
+@st.cache_resource
+def get_youtube(api_key):
+    return build("youtube", "v3", developerKey=api_key, static_discovery=True, cache_discovery=False)
+
+
+# every key shares the ledger, so the pool always knows which one has the most left
+@st.cache_resource
+def get_key_pool():
+    return KeyPool(YT_KEYS, get_quota_ledger(), cooldown=QUOTA_COOLDOWN_SECONDS)
+
+
+def get_youtube_clients():
+    # built here on the script thread, the background jobs just look them up by key
+    return {key: get_youtube(key) for key in YT_KEYS}
+
+
+# shared by every job so the breaker sees the whole picture when youtube or spotify goes down
+@st.cache_resource
+def get_retriers():
+    return {"youtube": Retrier("YouTube", breaker=CircuitBreaker("YouTube")),
+            "spotify": Retrier("Spotify", breaker=CircuitBreaker("Spotify"))}
+
+
+# sessions converting the same playlist share one spotify fetch instead of each paging through it
+@st.cache_resource
+def get_tracklists():
+    return TrackListCache(max_bytes=int(PLAYLIST_CACHE_MB * 2**20), page_concurrency=SPOTIFY_PAGE_CONCURRENCY)
+
+
+@st.cache_resource
+def get_checkpoints():
+    return CheckpointStore(CHECKPOINT_DIR)
+
+
+# started once per process, the writer thread and the metrics server live as long as it does
+@st.cache_resource
+def start_metrics_export():
+    if METRICS_FILE:
+        TELEMETRY.start_writer(METRICS_FILE, interval=METRICS_FILE_INTERVAL)
+    if METRICS_PORT:
+        try:
+            TELEMETRY.serve_prometheus(METRICS_PORT)
+        except OSError as e:
+            logger.warning("Couldn't serve metrics on port %d: %s", METRICS_PORT, e)
+    return True
+
+
+start_metrics_export()
+
+
+@st.cache_resource
+def get_job_manager():
+    return JobManager(max_jobs=MAX_JOBS)
+
+
+# --- CONVERSION JOBS ---
+def run_conversion(job, sp, clients, cache, index, quota, retriers, tracklists, checkpoints, playlist_id):
+    # runs in a background thread, so no st.* calls in here
+    def show_progress(done, row):
+        job.set_message(f"Searching ({done}/{job.total or '?'}): {row['query']}")
+
+    def save_sync(summary):
+        job.set_info("sync", summary)
+
+    # live timing per pipeline stage, shown once the job is done
+    stages = {}
+    job.set_info("stages", stages)
+    # walks every page of the playlist, tracks start searching as soon as the first page lands.
+    # cached tracks skip youtube entirely, the rest are searched in parallel batches
+    # each worker gets its own http object since httplib2 isn't thread safe
+    # if the playlist changed since last time, only the added songs get searched
+    for row in convert_playlist(sp, clients[YT_KEY], playlist_id, checkpoints=checkpoints, tracklists=tracklists,
+                                page_concurrency=SPOTIFY_PAGE_CONCURRENCY, on_total=job.set_total,
+                                on_progress=show_progress, on_sync=save_sync, cache=cache, index=index, quota=quota,
+                                concurrency=SEARCH_CONCURRENCY, batch_size=SEARCH_BATCH_SIZE, verify=VERIFY_DURATIONS,
+                                verify_concurrency=VERIFY_CONCURRENCY, http_factory=build_http,
+                                youtube_for=clients.__getitem__, retry=retriers["youtube"],
+                                spotify_retry=retriers["spotify"], stats=stages):
+        job.add_row(row)
+
+
+def run_bulk_conversion(job, sp, clients, cache, index, quota, retriers, tracklists, playlist_ids, include_mine):
+    # one job for many playlists, a song that shows up in several of them only gets searched once
+    names = {}
+    if include_mine:
+        for playlist in iter_user_playlists(sp, retry=retriers["spotify"]):
+            names[playlist["id"]] = playlist.get("name") or playlist["id"]
+    playlist_ids = list(dict.fromkeys(list(playlist_ids) + list(names)))
+    job.set_info("playlists", names)
+    job.set_message(f"Converting {len(playlist_ids)} playlists...")
+
+    def show_progress(done, row):
+        job.set_message(f"Searching ({done}/{job.total or '?'}): {row['query']}")
+
+    # a deleted or private playlist just gets listed at the end instead of failing the whole job
+    failed_playlists = {}
+    job.set_info("failed_playlists", failed_playlists)
+
+    def skip_playlist(playlist_id, error):
+        failed_playlists[playlist_id] = str(error)
+
+    stages = {}
+    job.set_info("stages", stages)
+    for row in convert_playlists(sp, clients[YT_KEY], playlist_ids, tracklists=tracklists, on_total=job.set_total,
+                                 page_concurrency=SPOTIFY_PAGE_CONCURRENCY, on_progress=show_progress,
+                                 on_error=skip_playlist,
+                                 cache=cache, index=index, quota=quota, concurrency=SEARCH_CONCURRENCY,
+                                 batch_size=SEARCH_BATCH_SIZE, verify=VERIFY_DURATIONS,
+                                 verify_concurrency=VERIFY_CONCURRENCY, http_factory=build_http,
+                                 youtube_for=clients.__getitem__, retry=retriers["youtube"],
+                                 spotify_retry=retriers["spotify"], stats=stages):
+        job.add_row(row)
+
+
+def result_row(row, playlist_names=None):
+    result = {"Track": row["query"], "YouTube Link": row_link(row)}
+    if "playlist_id" in row:
+        result = {"Playlist": (playlist_names or {}).get(row["playlist_id"], row["playlist_id"]), **result}
+    return result
+
+
+def watch_job(job):
+    # polls a background job and draws its results, safe to interrupt with a rerun
+    with st.status(job.message, expanded=True) as status:
+        table_placeholder = st.empty()
+
+        # only the new rows get sent to the browser, the table is drawn once and appended to
+        table = {}
+        def append_rows(rows):
+            with TELEMETRY.span("render", "table") as span:
+                span.bytes = sum(len(str(value)) for row in rows for value in row.values())
+                if "element" not in table:
+                    table["element"] = table_placeholder.dataframe(pd.DataFrame(rows), use_container_width=True,
+                                                                   hide_index=True)
+                else:
+                    table["element"].add_rows(pd.DataFrame(rows))
+
+        seen = 0
+        with RowBatcher(append_rows, batch_size=TABLE_BATCH_SIZE, interval=TABLE_FLUSH_SECONDS) as batcher:
+            while True:
+                done = job.done
+                for row in job.rows_since(seen):
+                    batcher.add(result_row(row, job.info.get("playlists")))
+                    seen += 1
+                if done:
+                    break
+                batcher.poll()
+                status.update(label=job.message)
+                time.sleep(JOB_POLL_SECONDS)
+
+        if job.status == FAILED:
+            status.update(label="Conversion Failed", state="error")
+            st.error(f"Error: {job.error}")
+            return
+
+        rows = job.rows
+        cache_hits = sum(r["cached"] for r in rows)
+        queued = sum(r["queued"] for r in rows)
+        resumed = sum(r.get("resumed", False) for r in rows)
+        deduped = sum(r["deduped"] for r in rows)
+        indexed = sum(r.get("indexed", False) for r in rows)
+        failed = sum(r.get("failed", False) for r in rows)
+        if rows:
+            st.caption(f"⚡ {cache_hits}/{len(rows)} tracks came from the match cache "
+                       f"({cache_hits / len(rows):.0%} hit rate)")
+        if indexed:
+            st.caption(f"🔎 {indexed} tracks matched an earlier conversion of the same song under a different title")
+        if deduped:
+            st.caption(f"♻️ {deduped} repeated tracks reused an earlier search instead of a new one")
+        if resumed:
+            st.caption(f"↩️ Picked up where the last run stopped, {resumed} tracks were already done")
+        sync = job.info.get("sync")
+        if sync:
+            st.caption(f"🔄 Playlist changed since last time: {sync['added']} added, {sync['removed']} removed, "
+                       f"{sync['unchanged']} unchanged tracks carried over without searching")
+        if queued:
+            st.warning(f"YouTube quota ran out, {queued} tracks are queued. "
+                       "Convert again after the daily reset (midnight Pacific) to resume from the first "
+                       "unfinished track, tracks already found won't be searched again.")
+        if failed:
+            first_error = next(r["error"] for r in rows if r.get("failed"))
+            st.warning(f"{failed} tracks couldn't be searched because YouTube kept erroring ({first_error}). "
+                       "The rest converted fine, convert again later and only those tracks get retried.")
+        skipped = job.info.get("failed_playlists")
+        if skipped:
+            names = job.info.get("playlists") or {}
+            listed = ", ".join(names.get(playlist_id, playlist_id) for playlist_id in skipped)
+            st.warning(f"{len(skipped)} playlists couldn't be read from Spotify and were skipped: {listed}")
+        status.update(label="Conversion Complete!", state="complete")
+        names = job.info.get("playlists")
+        show_download(rows, names)
+        show_playlist_links(rows, names)
+        show_stage_stats(job.info.get("stages"))
+
+
+def show_stage_stats(stages):
+    # where the time went, the stage with the highest busy per worker is the bottleneck
+    if not stages:
+        return
+    with st.expander("⏱️ Pipeline timing"):
+        st.dataframe(pd.DataFrame([s.as_dict() for s in stages.values()]), use_container_width=True, hide_index=True)
+
+
+def show_download(rows, names=None):
+    # only the picked format gets built, streamed straight into one buffer instead of a big joined string
+    fmt = st.selectbox("Download format", list(EXPORT_FORMATS), format_func=str.upper)
+    _, extension, mime = EXPORT_FORMATS[fmt]
+    data = io.BytesIO()
+    with TELEMETRY.span("render", f"download.{fmt}") as span:
+        for chunk in export_rows(rows, fmt, names):
+            data.write(chunk.encode("utf-8"))
+        span.bytes = data.tell()
+    data.seek(0)
+    st.download_button(f"📂 Download Playlist (.{extension})", data, file_name=f"my_playlist.{extension}", mime=mime)
+
+
+def show_playlist_links(rows, names=None):
+    # watch_videos links play the matches as a playlist, no api calls or google login needed
+    by_playlist = {}
+    for row in rows:
+        by_playlist.setdefault(row.get("playlist_id"), []).append(row["video_id"])
+    st.markdown("**▶️ Play it on YouTube**")
+    for playlist_id, video_ids in by_playlist.items():
+        links = playlist_links(video_ids)
+        title = (names or {}).get(playlist_id, playlist_id) if playlist_id else "Playlist"
+        for part, link in enumerate(links, 1):
+            suffix = f" (part {part} of {len(links)})" if len(links) > 1 else ""
+            st.markdown(f"- [{title}{suffix}]({link})")
+
+
+# the job id lives in the url so a refreshed page can find its conversion again
+attached_job = get_job_manager().get(st.query_params.get("job") or st.session_state.get("job_id"))
+
+
+def owns_job(job, profile):
+    # the rows list the tracks of someone's (maybe private) playlists, so only the person who started it sees them
+    if job.id == st.session_state.get("job_id"):
+        return True
+    return job.owner is not None and job.owner == (profile or {}).get("id")
+
+
+def job_status(job):
+    # just how far along it is for anyone else holding the link, the message and label name tracks and playlists
+    progress = f"{len(job.rows)}/{job.total or '?'} tracks"
+    st.info(f"This conversion is {job.status} ({progress}). "
+            "Log in with the Spotify account that started it to see the results.")
+
+
 # --- AUTHENTICATION LOGIC ---
 # Using MemoryCacheHandler prevents Railway from being annoying and not working
 if 'cache_handler' not in st.session_state:
@@ -54,18 +385,59 @@ if not token_info:
     auth_url = sp_oauth.get_authorize_url()
     st.info("Please link your Spotify account to begin.")
     st.link_button("🔑 Login with Spotify", auth_url)
+    if attached_job:
+        job_status(attached_job)
     st.stop()
 
 # 3. Successful session
-sp = spotipy.Spotify(auth=token_info['access_token'])
+# keep one Spotify client per session and only rebuild it when the token changes
+if st.session_state.get("sp_token") != token_info['access_token']:
+    st.session_state.sp = spotipy.Spotify(auth=token_info['access_token'])
+    st.session_state.sp_token = token_info['access_token']
+sp = st.session_state.sp
 
-with st.sidebar:
+# profile only gets fetched once per token instead of on every rerun
+if st.session_state.get("profile_token") != token_info['access_token']:
     try:
-        user_info = sp.current_user()
+        st.session_state.profile = sp.current_user()
+    except Exception:
+        st.session_state.profile = None
+    st.session_state.profile_token = token_info['access_token']
+
+# logging in again after a refresh loses ?job= on the redirect, so pick the user's latest job back up
+if attached_job is None:
+    attached_job = get_job_manager().latest_for((st.session_state.profile or {}).get("id"))
+    if attached_job:
+        st.session_state.job_id = attached_job.id
+        st.query_params["job"] = attached_job.id
+
+with st.sidebar:
+    user_info = st.session_state.profile
+    if user_info and user_info.get('display_name'):
         st.success(f"Connected as {user_info['display_name']}")
-    except:
+    else:
         st.success("Spotify Connected")
     
+    if YT_KEY:
+        # each search costs 100 units so this is roughly how many new songs we can still look up today
+        pool = get_key_pool()
+        quota_left = pool.remaining
+        st.metric("YouTube quota left today", f"{quota_left:,} units", help=f"≈ {quota_left // 100} new searches")
+        if len(pool.api_keys) > 1:
+            with st.expander(f"🔑 {len(pool.api_keys)} API keys"):
+                # only a hash of each key is shown, never the key itself
+                usage = pd.DataFrame(pool.usage())
+                usage["resting_until"] = pd.to_datetime(usage["resting_until"], unit="s")
+                st.dataframe(usage, use_container_width=True, hide_index=True)
+    
+    # where the seconds go across every conversion on this server, also exported for the dashboards
+    with st.expander("📈 Telemetry"):
+        calls = TELEMETRY.snapshot()
+        if calls:
+            st.dataframe(pd.DataFrame(calls), use_container_width=True, hide_index=True)
+        else:
+            st.caption("Nothing recorded yet")
+
     if st.button("Logout & Reset"):
         # Reset memory cache and rerun
         st.session_state.cache_handler = MemoryCacheHandler()
@@ -75,38 +447,43 @@ with st.sidebar:
 url = st.text_input("🔗 Paste Spotify Playlist URL", placeholder="https://open.spotify.com/playlist/...")
 
 if st.button("Convert to YouTube", use_container_width=True):
+    playlist_id = parse_playlist_id(url) if url else None
     if not url:
         st.warning("Please enter a URL first.")
     elif not YT_KEY:
         st.error("YouTube API Key missing in Railway Variables!")
+    elif not playlist_id:
+        st.error("Invalid URL format.")
     else:
-        with st.status("Converting...", expanded=True) as status:
-            try:
-                # gets playlist id
-                if "playlist/" not in url:
-                    st.error("Invalid URL format.")
-                    st.stop()
-                
-                playlist_id = url.split("playlist/")[1].split("?")[0]
-                results = sp.playlist_items(playlist_id)
-                tracks = [f"{i['item']['name']} {i['item']['artists'][0]['name']}" 
-                          for i in results['items'] if i.get('item') and i['item'].get('name')]
-                
-                final_results = []
-                table_placeholder = st.empty()
-                youtube = build("youtube", "v3", developerKey=YT_KEY)
-                
-                for track in tracks:
-                    status.update(label=f"Searching: {track}")
-                    resp = youtube.search().list(q=track, part="snippet", maxResults=1, type="video").execute()
-                    
-                    link = f"https://www.youtube.com/watch?v={resp['items'][0]['id']['videoId']}" if resp["items"] else "Not found"
-                    final_results.append({"Track": track, "YouTube Link": link})
-                    table_placeholder.dataframe(pd.DataFrame(final_results), use_container_width=True, hide_index=True)
-                
-                status.update(label="Conversion Complete!", state="complete")
-                txt_data = "\n".join([f"{r['Track']}: {r['YouTube Link']}" for r in final_results])
-                st.download_button("📂 Download Playlist (.txt)", txt_data, file_name="my_playlist.txt")
-                
-            except Exception as e:
-                st.error(f"Error: {e}")
+        attached_job = get_job_manager().submit(
+            run_conversion, sp, get_youtube_clients(), get_match_cache(), get_match_index(),
+            get_key_pool(), get_retriers(), get_tracklists(), get_checkpoints(), playlist_id, label=url,
+            owner=(st.session_state.profile or {}).get("id"))
+        st.session_state.job_id = attached_job.id
+        st.query_params["job"] = attached_job.id
+
+with st.expander("📚 Convert many playlists at once"):
+    bulk_urls = st.text_area("One Spotify playlist URL per line", height=120)
+    include_mine = st.checkbox("Include all my playlists")
+    if st.button("Convert all to YouTube", use_container_width=True):
+        lines = [line.strip() for line in bulk_urls.splitlines() if line.strip()]
+        bulk_ids = [parse_playlist_id(line) for line in lines]
+        bad = [line for line, playlist_id in zip(lines, bulk_ids) if not playlist_id]
+        if not YT_KEY:
+            st.error("YouTube API Key missing in Railway Variables!")
+        elif bad:
+            st.error(f"Invalid URL format: {bad[0]}")
+        elif not bulk_ids and not include_mine:
+            st.warning("Paste some playlist URLs or tick \"Include all my playlists\".")
+        else:
+            attached_job = get_job_manager().submit(
+                run_bulk_conversion, sp, get_youtube_clients(), get_match_cache(), get_match_index(),
+                get_key_pool(), get_retriers(), get_tracklists(), bulk_ids, include_mine,
+                label=f"{len(bulk_ids)} playlists", owner=(st.session_state.profile or {}).get("id"))
+            st.session_state.job_id = attached_job.id
+            st.query_params["job"] = attached_job.id
+
+if attached_job and owns_job(attached_job, st.session_state.profile):
+    watch_job(attached_job)
+elif attached_job:
+    job_status(attached_job)
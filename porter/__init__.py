@@ -0,0 +1,65 @@
+"""
+Playlist Porter conversion package.
+
+This package holds the Spotify -> YouTube conversion logic used by the
+Streamlit app in ``main.py``. Nothing in here imports Streamlit, so the same
+code can be driven from scripts and benchmarks.
+"""
+
+from porter.cache import MatchCache
+from porter.checkpoint import CheckpointStore
+from porter.converter import convert_playlist, convert_playlists, convert_tracks
+from porter.export import FORMATS as EXPORT_FORMATS, export_rows
+from porter.index import MatchIndex
+from porter.jobs import Job, JobManager
+from porter.keys import KeyPool, load_api_keys
+from porter.links import playlist_links
+from porter.normalize import match_key
+from porter.pipeline import Pipeline, Stage, StageStats
+from porter.quota import QuotaAccount, QuotaLedger
+from porter.retry import CircuitBreaker, CircuitOpenError, Retrier
+from porter.spotify import (
+    iter_playlist_entries,
+    iter_playlist_tracks,
+    iter_user_playlists,
+    parse_playlist_id,
+    track_query,
+)
+from porter.telemetry import TELEMETRY, Telemetry
+from porter.tracklists import TrackListCache
+from porter.youtube import DEFAULT_CONCURRENCY, watch_url
+
+__all__ = [
+    "DEFAULT_CONCURRENCY",
+    "CheckpointStore",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "EXPORT_FORMATS",
+    "Job",
+    "JobManager",
+    "KeyPool",
+    "MatchCache",
+    "MatchIndex",
+    "Pipeline",
+    "QuotaAccount",
+    "QuotaLedger",
+    "Retrier",
+    "Stage",
+    "StageStats",
+    "TELEMETRY",
+    "Telemetry",
+    "TrackListCache",
+    "convert_playlist",
+    "convert_playlists",
+    "convert_tracks",
+    "export_rows",
+    "iter_playlist_entries",
+    "iter_playlist_tracks",
+    "iter_user_playlists",
+    "load_api_keys",
+    "match_key",
+    "parse_playlist_id",
+    "playlist_links",
+    "track_query",
+    "watch_url",
+]
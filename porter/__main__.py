@@ -0,0 +1,12 @@
+"""
+Main entry point for running the headless converter as a module.
+
+This allows the converter to be run with `python -m porter`.
+"""
+
+import sys
+
+from porter.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
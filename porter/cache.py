@@ -0,0 +1,151 @@
+"""
+Persistent track -> video match cache for Playlist Porter.
+
+Every YouTube search costs 100 units of Data API quota, so once a track has
+been matched the result is kept in a local SQLite file and reused by every
+later conversion in the same deployment. Entries are stored under the
+Spotify track ID and under the track's normalized match key (see
+``porter.normalize``), so re-released and re-tagged copies of a song share
+an entry. Entries expire after a TTL and are evicted least-recently-used
+once the store grows past a size limit.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from porter.telemetry import TELEMETRY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(".porter_cache", "matches.sqlite3")
+DEFAULT_TTL = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 200_000
+
+# Check the size limit once every this many writes rather than on each one
+_EVICT_EVERY = 500
+
+
+class MatchCache:
+    """
+    SQLite-backed store of resolved YouTube matches.
+
+    A cached "no result" (``video_id`` of None) is a valid hit too, so tracks
+    YouTube has nothing for do not burn a search on every conversion.
+
+    The object is safe to share between threads and Streamlit sessions.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        """
+        Open (or create) the cache file.
+
+        Args:
+            path: SQLite file path, or ``":memory:"``
+            ttl: Seconds an entry stays valid after it was written
+            max_entries: Rows kept before least-recently-used ones are evicted
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and path != ":memory:":
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS matches ("
+            " key TEXT PRIMARY KEY,"
+            " video_id TEXT,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS matches_last_used ON matches (last_used)")
+
+    @staticmethod
+    def _keys(track_id: Optional[str], key: str) -> Tuple[str, ...]:
+        keys = (f"k:{key}",)
+        return (f"id:{track_id}",) + keys if track_id else keys
+
+    def get(self, track_id: Optional[str], key: str) -> Tuple[bool, Optional[str]]:
+        """
+        Look up a match by track ID, falling back to the match key.
+
+        Args:
+            track_id: Spotify track ID (None for local files)
+            key: The track's ``porter.normalize.match_key``
+
+        Returns:
+            ``(hit, video_id)``; ``video_id`` may be None on a hit when the
+            track was previously searched and nothing was found
+        """
+        now = time.time()
+        with TELEMETRY.span("cache", "get"), self._lock:
+            for row_key in self._keys(track_id, key):
+                row = self._conn.execute(
+                    "SELECT video_id, created FROM matches WHERE key = ?", (row_key,)
+                ).fetchone()
+                if row is None:
+                    continue
+                if now - row[1] > self.ttl:
+                    self._conn.execute("DELETE FROM matches WHERE key = ?", (row_key,))
+                    continue
+                self._conn.execute("UPDATE matches SET last_used = ? WHERE key = ?", (now, row_key))
+                self.hits += 1
+                return True, row[0]
+            self.misses += 1
+            return False, None
+
+    def put(self, track_id: Optional[str], key: str, video_id: Optional[str]) -> None:
+        """
+        Store a match under both the track ID and the match key.
+
+        Args:
+            track_id: Spotify track ID (None for local files)
+            key: The track's ``porter.normalize.match_key``
+            video_id: Matched video ID, or None if the search found nothing
+        """
+        now = time.time()
+        with TELEMETRY.span("cache", "put"), self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO matches (key, video_id, created, last_used) VALUES (?, ?, ?, ?)",
+                [(row_key, video_id, now, now) for row_key in self._keys(track_id, key)],
+            )
+            self._writes += 1
+            if self._writes % _EVICT_EVERY == 0:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Drop expired rows, then the least recently used ones over the limit."""
+        self._conn.execute("DELETE FROM matches WHERE created < ?", (time.time() - self.ttl,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM matches").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM matches WHERE key IN"
+                " (SELECT key FROM matches ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            logger.debug("Evicted %d match cache entries", excess)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
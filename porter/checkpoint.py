@@ -0,0 +1,227 @@
+"""
+On-disk conversion checkpoints for Playlist Porter.
+
+Each playlist gets a JSON Lines file: a header line with the playlist and
+snapshot IDs, then one line per resolved track, appended as it resolves. A
+conversion that dies partway (quota exhausted, dyno restart, network error)
+picks up from the first unresolved track on the next run, so searches that
+were already paid for are never repeated.
+
+Rows are only resumed in place while the playlist's ``snapshot_id`` is
+unchanged. Once the playlist is edited, the old rows still serve as the
+previous track -> video mapping, so a re-sync only searches for the tracks
+that were added.
+
+Only one checkpoint per playlist is open at a time: a second conversion of
+the same playlist (a double-clicked Convert, two sessions) waits for the
+first to finish, then resumes from everything it resolved.
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(".porter_cache", "checkpoints")
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_-]")
+
+
+def _line(record: Dict[str, Any]) -> str:
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+class Checkpoint:
+    """
+    An open checkpoint for one playlist snapshot.
+
+    ``rows`` holds the contiguous run of resolved rows from the start of the
+    playlist that a previous run of the same snapshot left behind.
+    ``previous`` maps every track ID the file knows about, from any snapshot,
+    to its resolved row; ``previous_track_ids`` are the ones the last run
+    itself saw. New rows are added with ``record``. Use as a context
+    manager so the file is closed and ``lock`` released.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        playlist_id: str,
+        snapshot_id: Optional[str],
+        rows: List[Dict[str, Any]],
+        previous: Dict[str, Dict[str, Any]],
+        previous_snapshot_id: Optional[str] = None,
+        previous_track_ids: Optional[Set[str]] = None,
+        lock: Optional[threading.Lock] = None,
+    ):
+        self.path = path
+        self.playlist_id = playlist_id
+        self.snapshot_id = snapshot_id
+        self.rows = rows
+        self.previous = previous
+        self.previous_snapshot_id = previous_snapshot_id
+        self.previous_track_ids = previous_track_ids or set()
+        self._lock = threading.Lock()
+        self._playlist_lock = lock
+        # rewrite rather than append so a torn last line from a crash can't
+        # run into the next record. The rewrite goes to a temporary file that
+        # replaces the old one, so a crash halfway through it loses nothing
+        directory, name = os.path.split(path)
+        fd, tmp = tempfile.mkstemp(prefix=f"{name}.", suffix=".tmp", dir=directory or None)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(_line({"playlist_id": playlist_id, "snapshot_id": snapshot_id}))
+                for index, row in enumerate(rows):
+                    fh.write(_line({"index": index, **row}))
+                in_rows = {row.get("track_id") for row in rows}
+                for track_id, row in previous.items():
+                    if track_id not in in_rows:
+                        fh.write(_line({"index": None, **row}))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._file = open(path, "a", encoding="utf-8")
+
+    @property
+    def next_position(self) -> int:
+        """Playlist position to resume fetching from."""
+        return self.rows[-1]["position"] + 1 if self.rows else 0
+
+    @property
+    def changed(self) -> bool:
+        """True if an earlier run saw a different snapshot of this playlist."""
+        return self.previous_snapshot_id is not None and self.previous_snapshot_id != self.snapshot_id
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._file.write(_line(record))
+        self._file.flush()
+
+    def record(self, index: int, row: Dict[str, Any]) -> None:
+        """
+        Append a resolved row.
+
+        Args:
+            index: Row number in the converted playlist (0-based)
+            row: Result row; must include the track's playlist ``position``
+        """
+        with self._lock:
+            self._write({"index": index, **row})
+
+    def close(self) -> None:
+        """Close the checkpoint file and let the next conversion of the playlist open it."""
+        with self._lock:
+            self._file.close()
+            if self._playlist_lock is not None:
+                self._playlist_lock.release()
+                self._playlist_lock = None
+
+    def __enter__(self) -> "Checkpoint":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class CheckpointStore:
+    """Directory of per-playlist checkpoint files."""
+
+    def __init__(self, directory: str = DEFAULT_CHECKPOINT_DIR):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Where checkpoint files are kept; created if missing
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        # one lock per playlist file, held while a checkpoint for it is open
+        self._open: Dict[str, threading.Lock] = {}
+        self._open_lock = threading.Lock()
+
+    def path(self, playlist_id: str) -> str:
+        """Return the checkpoint file path for a playlist."""
+        return os.path.join(self.directory, _UNSAFE.sub("_", playlist_id) + ".jsonl")
+
+    def _read(self, playlist_id: str) -> Tuple[Dict[str, Any], Dict[int, Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Return the header, the indexed rows and the carried-over rows of a checkpoint file.
+
+        Lines are keyed by row index, so a duplicated or torn final line from
+        an interrupted write is harmless.
+        """
+        path = self.path(playlist_id)
+        by_index: Dict[int, Dict[str, Any]] = {}
+        carried: List[Dict[str, Any]] = []
+        if not os.path.exists(path):
+            return {}, by_index, carried
+        with open(path, encoding="utf-8") as fh:
+            try:
+                header = json.loads(fh.readline() or "{}")
+            except ValueError:
+                return {}, by_index, carried
+            if header.get("playlist_id") != playlist_id:
+                return {}, by_index, carried
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                index = record.pop("index", None)
+                if index is None:
+                    carried.append(record)
+                else:
+                    by_index[index] = record
+        return header, by_index, carried
+
+    def open(self, playlist_id: str, snapshot_id: Optional[str]) -> Checkpoint:
+        """
+        Open the checkpoint for a playlist snapshot, resuming it if possible.
+
+        If the file belongs to a different snapshot nothing is resumed, but
+        its rows are kept as the previous mapping for a re-sync. If the
+        playlist's checkpoint is already open, this waits until it is closed.
+        """
+        path = self.path(playlist_id)
+        with self._open_lock:
+            lock = self._open.setdefault(path, threading.Lock())
+        lock.acquire()
+        try:
+            return self._open_locked(playlist_id, snapshot_id, lock)
+        except BaseException:
+            lock.release()
+            raise
+
+    def _open_locked(self, playlist_id: str, snapshot_id: Optional[str], lock: threading.Lock) -> Checkpoint:
+        header, by_index, carried = self._read(playlist_id)
+        same = bool(header) and header.get("snapshot_id") == snapshot_id
+        if header and not same:
+            logger.debug("Playlist %s changed since its last conversion, re-syncing", playlist_id)
+
+        previous: Dict[str, Dict[str, Any]] = {}
+        for row in carried + [by_index[i] for i in sorted(by_index)]:
+            if row.get("track_id") and not row.get("queued"):
+                previous[row["track_id"]] = row
+        return Checkpoint(
+            self.path(playlist_id),
+            playlist_id,
+            snapshot_id,
+            _prefix(by_index) if same else [],
+            previous,
+            previous_snapshot_id=header.get("snapshot_id") if header else None,
+            previous_track_ids={row["track_id"] for row in by_index.values() if row.get("track_id")},
+            lock=lock,
+        )
+
+
+def _prefix(by_index: Dict[int, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Return the rows at indices 0, 1, 2, ... up to the first gap."""
+    rows = []
+    while len(rows) in by_index:
+        rows.append(by_index[len(rows)])
+    return rows
@@ -0,0 +1,276 @@
+"""
+Headless batch converter for Playlist Porter.
+
+Runs the same conversion pipeline as the Streamlit app (pagination, match
+cache, quota ledger, checkpoints, concurrent batched searches) without
+importing Streamlit, so bulk work can run from cron or CI on a worker
+instead of the web dyno. Playlists are read from a file of URLs and results
+are streamed out as JSON Lines (or CSV, M3U or text with ``--format``).
+
+Usage::
+
+    python -m porter playlists.txt -o results.jsonl
+
+Spotify access uses the client-credentials flow, so only public playlists
+can be read.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from porter.cache import DEFAULT_CACHE_PATH, DEFAULT_MAX_ENTRIES, MatchCache
+from porter.checkpoint import DEFAULT_CHECKPOINT_DIR, CheckpointStore
+from porter.converter import DEFAULT_BATCH_SIZE, DEFAULT_VERIFY_CONCURRENCY, convert_playlist
+from porter.export import FORMATS, export_rows
+from porter.index import DEFAULT_INDEX_PATH, DEFAULT_THRESHOLD, MatchIndex
+from porter.keys import KeyPool, load_api_keys
+from porter.retry import CircuitBreaker, Retrier
+from porter.pipeline import StageStats
+from porter.quota import DEFAULT_DAILY_QUOTA, DEFAULT_LEDGER_PATH, QuotaLedger
+from porter.spotify import DEFAULT_PAGE_CONCURRENCY, parse_playlist_id
+from porter.telemetry import TELEMETRY
+from porter.youtube import DEFAULT_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+
+def read_playlist_urls(fh: TextIO) -> Iterator[str]:
+    """Yield the non-blank, non-comment lines of a URL list."""
+    for line in fh:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
+    env = os.environ.get
+    parser = argparse.ArgumentParser(
+        prog="python -m porter",
+        description="Convert Spotify playlists to YouTube links without the web UI.",
+    )
+    parser.add_argument("input", help="file with one Spotify playlist URL per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=list(FORMATS),
+        default="jsonl",
+        help="output format (default: jsonl); jsonl output is appended to, others are overwritten",
+    )
+    parser.add_argument(
+        "--page-concurrency",
+        type=int,
+        default=int(env("SPOTIFY_PAGE_CONCURRENCY", DEFAULT_PAGE_CONCURRENCY)),
+        help="Spotify playlist pages fetched at once",
+    )
+    parser.add_argument("--concurrency", type=int, default=int(env("YOUTUBE_SEARCH_CONCURRENCY", DEFAULT_CONCURRENCY)))
+    parser.add_argument("--batch-size", type=int, default=int(env("YOUTUBE_BATCH_SIZE", DEFAULT_BATCH_SIZE)))
+    parser.add_argument("--no-verify", action="store_true", help="take the top search hit without a duration check")
+    parser.add_argument(
+        "--verify-concurrency", type=int, default=int(env("VERIFY_CONCURRENCY", DEFAULT_VERIFY_CONCURRENCY))
+    )
+    parser.add_argument("--cache", default=env("MATCH_CACHE_PATH", DEFAULT_CACHE_PATH))
+    parser.add_argument("--cache-ttl-days", type=float, default=float(env("MATCH_CACHE_TTL_DAYS", 30)))
+    parser.add_argument("--cache-max-entries", type=int, default=int(env("MATCH_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)))
+    parser.add_argument("--index", default=env("MATCH_INDEX_PATH", DEFAULT_INDEX_PATH), help="fuzzy match index file")
+    parser.add_argument(
+        "--index-threshold",
+        type=float,
+        default=float(env("MATCH_INDEX_THRESHOLD", DEFAULT_THRESHOLD)),
+        help="similarity (0-1) a past match needs to be reused without searching",
+    )
+    parser.add_argument("--quota-ledger", default=env("QUOTA_LEDGER_PATH", DEFAULT_LEDGER_PATH))
+    parser.add_argument("--daily-quota", type=int, default=int(env("YOUTUBE_DAILY_QUOTA", DEFAULT_DAILY_QUOTA)))
+    parser.add_argument(
+        "--quota-cooldown",
+        type=float,
+        default=float(env("QUOTA_COOLDOWN_SECONDS") or 0) or None,
+        help="seconds a key rests after quotaExceeded (default: until the daily reset)",
+    )
+    parser.add_argument("--checkpoints", default=env("CHECKPOINT_DIR", DEFAULT_CHECKPOINT_DIR))
+    parser.add_argument(
+        "--metrics-file",
+        default=env("METRICS_FILE", ""),
+        help="write call timings here in Prometheus text format when done",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="log progress for every track")
+    return parser
+
+
+def _spotify_client() -> Any:
+    import spotipy
+    from spotipy.oauth2 import SpotifyClientCredentials
+
+    return spotipy.Spotify(
+        auth_manager=SpotifyClientCredentials(
+            client_id=os.environ.get("SPOTIPY_CLIENT_ID", "").strip(),
+            client_secret=os.environ.get("SPOTIPY_CLIENT_SECRET", "").strip(),
+        )
+    )
+
+
+def _youtube_client(api_key: str) -> Any:
+    from googleapiclient.discovery import build
+
+    return build("youtube", "v3", developerKey=api_key, static_discovery=True, cache_discovery=False)
+
+
+def _http_factory() -> Any:
+    from googleapiclient.http import build_http
+
+    return build_http
+
+
+def run(
+    urls: List[str],
+    out: TextIO,
+    sp: Any,
+    clients: Dict[str, Any],
+    args: argparse.Namespace,
+    http_factory: Optional[Any] = None,
+) -> Dict[str, int]:
+    """
+    Convert every playlist in ``urls`` and stream the results to ``out``.
+
+    Args:
+        urls: Playlist URLs
+        out: Text stream the results are written to, in ``args.format``
+        sp: Spotify client
+        clients: YouTube API key -> Data API resource built with it; every
+            key joins the quota pool
+        args: Parsed command-line options
+        http_factory: Builds an HTTP transport per worker thread
+
+    Returns:
+        Counts of ``playlists``, ``failed`` playlists, ``tracks``,
+        ``queued`` tracks and ``errors`` (tracks whose search failed)
+    """
+    cache = MatchCache(args.cache, ttl=args.cache_ttl_days * 24 * 3600, max_entries=args.cache_max_entries)
+    index = MatchIndex(
+        args.index,
+        threshold=args.index_threshold,
+        ttl=args.cache_ttl_days * 24 * 3600,
+        max_entries=args.cache_max_entries,
+    )
+    ledger = QuotaLedger(args.quota_ledger, daily_limit=args.daily_quota)
+    quota = KeyPool(list(clients), ledger, cooldown=args.quota_cooldown)
+    youtube_retry = Retrier("YouTube", breaker=CircuitBreaker("YouTube"))
+    spotify_retry = Retrier("Spotify", breaker=CircuitBreaker("Spotify"))
+    youtube = next(iter(clients.values()))
+    checkpoints = CheckpointStore(args.checkpoints)
+    totals = {"playlists": 0, "failed": 0, "tracks": 0, "queued": 0, "errors": 0}
+
+    def _progress(done: int, row: Dict[str, Any]) -> None:
+        logger.debug("  %d: %s -> %s", done, row["query"], row["video_id"])
+
+    def _rows() -> Iterator[Dict[str, Any]]:
+        for url in urls:
+            playlist_id = parse_playlist_id(url)
+            if not playlist_id:
+                logger.error("Skipping invalid playlist URL: %s", url)
+                totals["failed"] += 1
+                continue
+            logger.info("Converting %s", playlist_id)
+            count = queued = errors = 0
+            stages: Dict[str, StageStats] = {}
+            try:
+                for row in convert_playlist(
+                    sp,
+                    youtube,
+                    playlist_id,
+                    checkpoints=checkpoints,
+                    page_concurrency=args.page_concurrency,
+                    on_progress=_progress,
+                    cache=cache,
+                    index=index,
+                    quota=quota,
+                    concurrency=args.concurrency,
+                    batch_size=args.batch_size,
+                    verify=not args.no_verify,
+                    verify_concurrency=args.verify_concurrency,
+                    http_factory=http_factory,
+                    youtube_for=clients.__getitem__,
+                    retry=youtube_retry,
+                    spotify_retry=spotify_retry,
+                    stats=stages,
+                ):
+                    yield {"playlist_id": playlist_id, **row}
+                    count += 1
+                    queued += row["queued"]
+                    errors += row["failed"]
+            except Exception as exc:
+                # one bad playlist shouldn't stop an overnight run
+                logger.error("Failed to convert %s: %s", playlist_id, exc)
+                totals["failed"] += 1
+                continue
+            finally:
+                out.flush()
+            totals["playlists"] += 1
+            totals["tracks"] += count
+            totals["queued"] += queued
+            totals["errors"] += errors
+            logger.info(
+                "  %d tracks (%d queued, %d failed), %d quota units left", count, queued, errors, quota.remaining
+            )
+            for stage in stages.values():
+                logger.debug("  stage %s", stage.as_dict())
+
+    for chunk in export_rows(_rows(), args.format):
+        out.write(chunk)
+    for usage in quota.usage():
+        logger.info("  key %s: %d units spent, %d left today", usage["key"], usage["spent"], usage["remaining"])
+
+    cache.close()
+    return totals
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point; returns the process exit code."""
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+        stream=sys.stderr,
+    )
+
+    api_keys = load_api_keys(os.environ)
+    if not api_keys:
+        logger.error("No YouTube API key set (YOUTUBE_API_KEY, YOUTUBE_API_KEYS or YOUTUBE_API_KEYS_FILE)")
+        return 2
+
+    if args.input == "-":
+        urls = list(read_playlist_urls(sys.stdin))
+    else:
+        with open(args.input, encoding="utf-8") as fh:
+            urls = list(read_playlist_urls(fh))
+
+    # JSON Lines can grow across runs, the other formats have a header and are rewritten
+    mode = "a" if args.format == "jsonl" else "w"
+    out = sys.stdout if args.output == "-" else open(args.output, mode, encoding="utf-8", newline="")
+    try:
+        clients = {key: _youtube_client(key) for key in api_keys}
+        totals = run(urls, out, _spotify_client(), clients, args, _http_factory())
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    logger.info(
+        "Done: %d playlists, %d tracks, %d queued for lack of quota, %d track errors, %d failed",
+        totals["playlists"],
+        totals["tracks"],
+        totals["queued"],
+        totals["errors"],
+        totals["failed"],
+    )
+    for call in TELEMETRY.snapshot():
+        logger.debug("  %(operation)s %(call)s: %(count)d calls, %(total_s).1fs, p95 %(p95_ms).0f ms", call)
+    if args.metrics_file:
+        try:
+            TELEMETRY.write_prometheus(args.metrics_file)
+        except OSError as exc:
+            logger.error("Could not write metrics to %s: %s", args.metrics_file, exc)
+    return 1 if totals["failed"] else 0
@@ -0,0 +1,523 @@
+"""
+Track conversion driver for Playlist Porter.
+
+``convert_tracks`` takes Spotify track objects, answers what it can from the
+match cache and the fuzzy match index and sends the rest to YouTube search through a staged pipeline,
+yielding one result row per track in playlist order. Searches can be grouped into
+batch requests of ``batch_size`` tracks, and their candidates checked against
+the Spotify track length before one is picked. When a quota account is given, each
+search is paid for up front; once the day's budget is gone the remaining
+tracks are returned as queued instead of failing the conversion.
+
+``convert_playlist`` wraps it for a whole Spotify playlist and records each
+resolved row in a checkpoint, so an interrupted conversion resumes where it
+stopped and a re-run of an edited playlist only searches the added tracks.
+``convert_playlists`` runs several playlists as one job, searching each track
+they share only once.
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from porter.cache import MatchCache
+from porter.checkpoint import CheckpointStore
+from porter.index import MatchIndex
+from porter.normalize import match_key
+from porter.pipeline import DEFAULT_QUEUE_SIZE, Emit, Pipeline, Stage, StageStats
+from porter.pool import per_thread
+from porter.keys import KeyPool
+from porter.quota import QuotaAccount
+from porter.retry import Retrier
+from porter.spotify import DEFAULT_PAGE_CONCURRENCY, iter_playlist_entries, playlist_snapshot_id, track_query
+from porter.tracklists import TrackListCache
+from porter.verify import DEFAULT_CANDIDATES, calls_needed, fetch_durations, pick_candidate
+from porter.youtube import DEFAULT_CONCURRENCY, MAX_BATCH_SIZE, is_quota_error, search_batch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 10
+DEFAULT_VERIFY_CONCURRENCY = 2
+
+# A partial search batch is sent once no new track has arrived for this long
+_BATCH_IDLE_SECONDS = 0.2
+
+
+class _Work:
+    """One track on its way through the conversion pipeline."""
+
+    __slots__ = ("seq", "track", "query", "key", "row", "candidates")
+
+    def __init__(self, seq: int, track: Dict[str, Any], query: str, key: str):
+        self.seq = seq
+        self.track = track
+        self.query = query
+        self.key = key
+        self.row: Optional[Dict[str, Any]] = None
+        self.candidates: List[str] = []
+
+
+def _row(
+    track: Dict[str, Any],
+    video_id: Optional[str],
+    cached: bool = False,
+    queued: bool = False,
+    carried: bool = False,
+    deduped: bool = False,
+    indexed: bool = False,
+    error: Optional[BaseException] = None,
+) -> Dict[str, Any]:
+    return {
+        "track_id": track.get("id"),
+        "query": track_query(track),
+        "duration_ms": track.get("duration_ms"),
+        "video_id": video_id,
+        "cached": cached,
+        "queued": queued,
+        "carried": carried,
+        "deduped": deduped,
+        "indexed": indexed,
+        "failed": error is not None,
+        "error": (str(error) or type(error).__name__) if error is not None else None,
+    }
+
+
+def convert_tracks(
+    youtube: Any,
+    tracks: Iterable[Dict[str, Any]],
+    known: Optional[Dict[str, Optional[str]]] = None,
+    cache: Optional[MatchCache] = None,
+    index: Optional[MatchIndex] = None,
+    quota: Optional[Union[QuotaAccount, KeyPool]] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    verify: bool = False,
+    candidates: int = DEFAULT_CANDIDATES,
+    verify_concurrency: int = DEFAULT_VERIFY_CONCURRENCY,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    http_factory: Optional[Callable[[], Any]] = None,
+    youtube_for: Optional[Callable[[str], Any]] = None,
+    retry: Optional[Retrier] = None,
+    on_progress: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+    stats: Optional[Dict[str, StageStats]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Resolve a YouTube video for each Spotify track.
+
+    The work runs as a staged pipeline (see ``porter.pipeline``): the
+    track source (which fetches Spotify pages) -> normalize -> lookup
+    (carried-over matches, match cache, match index, dedupe) -> batch -> search ->
+    verify, with this generator acting as the sink.
+
+    Args:
+        youtube: YouTube Data API resource
+        tracks: Spotify track objects in playlist order (may be a generator)
+        known: Track ID -> video ID mapping from an earlier conversion of
+            the same playlist; these tracks are carried over untouched
+        cache: Match cache checked before searching and filled afterwards
+        index: Fuzzy index of past matches, consulted after the cache misses
+            and fed every new match
+        quota: Quota account or ``KeyPool`` each search is charged to; a
+            chunk is charged to one key and retried on another if that key
+            reports ``quotaExceeded``
+        concurrency: Search stage workers, i.e. searches (or batches) in
+            flight at once
+        batch_size: Tracks grouped into one batch request, up to
+            ``MAX_BATCH_SIZE``; 1 sends every search on its own
+        verify: Ask each search for ``candidates`` results and pick the one
+            whose duration matches the Spotify track, using one batched
+            ``videos.list`` lookup per chunk
+        candidates: Search results considered when verifying
+        verify_concurrency: Verify stage workers
+        queue_size: Capacity of the queues between stages
+        http_factory: Builds a fresh HTTP transport for each worker thread
+        youtube_for: Returns the YouTube resource built with a given API
+            key, for requests charged to a ``KeyPool`` key; without it every
+            request goes through ``youtube``
+        retry: Retry policy (and circuit breaker) for the YouTube calls
+        on_progress: Called as ``on_progress(completed, row)`` from the
+            calling thread each time a track resolves, in completion order
+        stats: If given, filled with a live ``StageStats`` per stage
+
+    Yields:
+        Dictionaries with ``track_id``, ``query``, ``duration_ms``,
+        ``video_id``, ``cached``, ``queued``, ``carried``, ``deduped``,
+        ``indexed``, ``failed`` and ``error`` keys, in playlist order.
+        ``queued`` rows were not searched because the quota ran out.
+        ``failed`` rows hit an API error that retrying did not fix; the
+        message is in ``error`` and the other tracks carry on.
+        ``deduped`` rows repeat a track seen earlier in the stream (same
+        ``match_key``, e.g. a remastered copy) and reuse its result instead
+        of searching again.
+        ``indexed`` rows reuse the video of a similar, earlier matched
+        recording found in ``index``.
+    """
+    batch_size = min(max(1, int(batch_size)), MAX_BATCH_SIZE)
+    get_http = per_thread(http_factory)
+    out_of_quota = threading.Event()
+    # match keys already sent to search, so repeats wait for that result
+    searching: Set[str] = set()
+    pending: List[_Work] = []
+
+    def _normalize(item: Tuple[int, Dict[str, Any]], emit: Emit) -> None:
+        seq, track = item
+        emit(_Work(seq, track, track_query(track), match_key(track)))
+
+    def _lookup(work: _Work, emit: Emit) -> None:
+        track, track_id = work.track, work.track.get("id")
+        if known and track_id in known:
+            work.row = _row(track, known[track_id], carried=True)
+        elif cache is not None and _cache_hit(work):
+            pass
+        elif index is not None and _index_hit(work):
+            pass
+        elif out_of_quota.is_set():
+            work.row = _row(track, None, queued=True)
+        elif work.key in searching:
+            work.row = _row(track, None, deduped=True)
+        else:
+            searching.add(work.key)
+        emit(work)
+
+    def _cache_hit(work: _Work) -> bool:
+        hit, video_id = cache.get(work.track.get("id"), work.key)  # type: ignore[union-attr]
+        if hit:
+            work.row = _row(work.track, video_id, cached=True)
+        return hit
+
+    def _index_hit(work: _Work) -> bool:
+        video_id = index.lookup(work.track)  # type: ignore[union-attr]
+        if video_id is not None:
+            work.row = _row(work.track, video_id, indexed=True)
+        return video_id is not None
+
+    def _batch(work: _Work, emit: Emit) -> None:
+        if work.row is not None:
+            # already resolved, nothing to wait for
+            emit([work])
+            return
+        pending.append(work)
+        if len(pending) >= batch_size:
+            _flush(emit)
+
+    def _flush(emit: Emit) -> None:
+        if pending:
+            chunk = pending[:]
+            del pending[:]
+            emit(chunk)
+
+    def _queue(work: _Work) -> None:
+        out_of_quota.set()
+        work.row = _row(work.track, None, queued=True)
+
+    def _client(key: Optional[str]) -> Any:
+        return youtube_for(key) if youtube_for is not None and key is not None else youtube
+
+    def _reserve(todo: List[_Work]) -> Optional[str]:
+        # charge the searches to one key, queueing from the end whatever no key can pay for
+        while todo:
+            key = quota.reserve("search.list", len(todo))  # type: ignore[union-attr]
+            if key is not None:
+                return key
+            _queue(todo.pop())
+        return None
+
+    def _search(chunk: List[_Work], emit: Emit) -> None:
+        todo = [work for work in chunk if work.row is None]
+        while todo:
+            key = _reserve(todo) if quota is not None else None
+            if not todo:
+                break
+            queries = [w.query for w in todo]
+            try:
+                found = search_batch(
+                    _client(key), queries, http=get_http(), max_results=candidates if verify else 1, retry=retry
+                )
+            except Exception as exc:
+                # the whole round trip failed (or the circuit is open)
+                found = [exc] * len(todo)
+            rejected = []
+            for work, result in zip(todo, found):
+                if not isinstance(result, Exception):
+                    work.candidates = result
+                elif quota is not None and is_quota_error(result):
+                    rejected.append(work)
+                else:
+                    logger.warning("Search for %r failed: %s", work.query, result)
+                    work.row = _row(work.track, None, error=result)
+            if rejected:
+                # rest that key; the next round goes to another one, or queues
+                quota.exhaust(key)  # type: ignore[union-attr]
+            todo = rejected
+        emit(chunk)
+
+    def _verify(chunk: List[_Work], emit: Emit) -> None:
+        searched = [w for w in chunk if w.row is None]
+        durations: Dict[str, int] = {}
+        if verify:
+            ids = [video_id for w in searched if len(w.candidates) > 1 for video_id in w.candidates]
+            key = quota.reserve("videos.list", calls_needed(ids)) if quota is not None and ids else None
+            if ids and (quota is None or key is not None):
+                try:
+                    durations = fetch_durations(_client(key), ids, http=get_http(), retry=retry)
+                except Exception as exc:
+                    # the searches worked, so fall back to their top hits
+                    logger.warning("Duration check failed, using top search hits: %s", exc)
+        for work in searched:
+            work.row = _row(work.track, pick_candidate(work.candidates, durations, work.track.get("duration_ms")))
+        emit(chunk)
+
+    pipeline = Pipeline(
+        enumerate(tracks),
+        [
+            Stage("normalize", _normalize),
+            Stage("lookup", _lookup),
+            # a partial batch goes out once the source has been quiet for a moment
+            Stage("batch", _batch, flush=_flush, idle=_flush, idle_timeout=_BATCH_IDLE_SECONDS),
+            Stage("search", _search, workers=concurrency),
+            Stage("verify", _verify, workers=verify_concurrency),
+        ],
+        queue_size=queue_size,
+        source_name="fetch",
+    )
+    if stats is not None:
+        stats.update(pipeline.stats)
+
+    # sink: put rows back in playlist order; the first occurrence of a track
+    # is always yielded before any of its repeats
+    finished: Dict[int, _Work] = {}
+    resolved: Dict[str, Dict[str, Any]] = {}
+    completed = next_seq = 0
+    for chunk in pipeline:
+        for work in chunk:
+            row = work.row
+            if cache is not None and not (
+                row["cached"] or row["queued"] or row["carried"] or row["deduped"] or row["indexed"] or row["failed"]
+            ):
+                cache.put(row["track_id"], work.key, row["video_id"])
+            if index is not None and row["video_id"] and not (row["indexed"] or row["deduped"] or row["carried"]):
+                # cache hits go in too, so the index fills up from past conversions. Index hits
+                # never reach the cache, the index or a carried-over checkpoint row, so near
+                # matches can't chain into far ones
+                index.add(work.track, row["video_id"])
+            completed += 1
+            if on_progress is not None:
+                on_progress(completed, row)
+            finished[work.seq] = work
+        while next_seq in finished:
+            work = finished.pop(next_seq)
+            row = work.row
+            next_seq += 1
+            if row["deduped"]:
+                first = resolved[work.key]
+                row = {
+                    **row,
+                    "video_id": first["video_id"],
+                    "queued": first["queued"],
+                    "failed": first["failed"],
+                    "error": first["error"],
+                }
+            elif work.key in searching:
+                resolved.setdefault(work.key, row)
+            yield row
+
+
+def _entries(
+    sp: Any,
+    playlist_id: str,
+    snapshot_id: Optional[str],
+    tracklists: Optional[TrackListCache],
+    **kwargs: Any,
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Walk a playlist through the shared track list cache when there is one."""
+    if tracklists is not None:
+        return tracklists.entries(sp, playlist_id, snapshot_id, **kwargs)
+    return iter_playlist_entries(sp, playlist_id, **kwargs)
+
+
+def convert_playlist(
+    sp: Any,
+    youtube: Any,
+    playlist_id: str,
+    checkpoints: Optional[CheckpointStore] = None,
+    on_total: Optional[Callable[[int], None]] = None,
+    on_progress: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+    on_sync: Optional[Callable[[Dict[str, Any]], None]] = None,
+    spotify_retry: Optional[Retrier] = None,
+    tracklists: Optional[TrackListCache] = None,
+    page_concurrency: int = DEFAULT_PAGE_CONCURRENCY,
+    **options: Any,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Convert a whole Spotify playlist, resuming or re-syncing from a checkpoint.
+
+    If the playlist's snapshot is unchanged since the last run, resolved rows
+    are replayed and fetching resumes at the first unresolved track. If it
+    changed, tracks the last run already matched are carried over by track
+    ID and only added tracks are searched.
+
+    Args:
+        sp: Authenticated ``spotipy.Spotify`` client
+        youtube: YouTube Data API resource
+        playlist_id: Spotify playlist ID
+        checkpoints: Store to resume from and record progress in
+        on_total: Called with the playlist's total item count
+        on_progress: Called as ``on_progress(completed, row)``; ``completed``
+            includes rows resumed from the checkpoint
+        on_sync: Called once the playlist has been walked, if it changed
+            since the last run, with ``previous_snapshot_id``, ``added``,
+            ``removed`` and ``unchanged`` counts
+        spotify_retry: Retry policy (and circuit breaker) for the Spotify calls
+        tracklists: Shared track list cache; other sessions converting the
+            same playlist snapshot reuse (or join) this fetch
+        page_concurrency: Fetch stage workers, i.e. Spotify pages fetched at
+            once after the first
+        **options: Passed through to ``convert_tracks`` (cache, quota,
+            concurrency, batch_size, verify, http_factory, retry, ...)
+
+    Yields:
+        The rows from ``convert_tracks`` plus the track's playlist
+        ``position`` and a ``resumed`` flag, in playlist order. Resumed rows
+        come first and cost no API calls.
+    """
+    checkpoint = None
+    resumed: List[Dict[str, Any]] = []
+    known: Dict[str, Optional[str]] = {}
+    snapshot_id = None
+    if checkpoints is not None or tracklists is not None:
+        snapshot_id = playlist_snapshot_id(sp, playlist_id, spotify_retry)
+    if checkpoints is not None:
+        checkpoint = checkpoints.open(playlist_id, snapshot_id)
+        resumed = checkpoint.rows
+        known = {track_id: row["video_id"] for track_id, row in checkpoint.previous.items()}
+        if resumed:
+            logger.info("Resuming %s after %d resolved tracks", playlist_id, len(resumed))
+
+    try:
+        for row in resumed:
+            yield {**row, "resumed": True}
+
+        positions: Deque[int] = deque()
+
+        def _tracks() -> Iterator[Dict[str, Any]]:
+            entries = _entries(
+                sp,
+                playlist_id,
+                snapshot_id,
+                tracklists,
+                on_total=on_total,
+                start=checkpoint.next_position if checkpoint else 0,
+                retry=spotify_retry,
+                concurrency=page_concurrency,
+            )
+            for position, track in entries:
+                positions.append(position)
+                yield track
+
+        def _progress(completed: int, row: Dict[str, Any]) -> None:
+            if on_progress is not None:
+                on_progress(len(resumed) + completed, row)
+
+        index = len(resumed)
+        carried = 0
+        seen = {row.get("track_id") for row in resumed}
+        for row in convert_tracks(youtube, _tracks(), known=known, on_progress=_progress, **options):
+            # rows come back in the order the tracks went in
+            row = {**row, "position": positions.popleft(), "resumed": False}
+            seen.add(row["track_id"])
+            carried += row["carried"]
+            # queued and failed tracks stay out, so the next run picks them up
+            if checkpoint is not None and not (row["queued"] or row["failed"]):
+                checkpoint.record(index, row)
+            index += 1
+            yield row
+
+        if checkpoint is not None and checkpoint.changed and on_sync is not None:
+            on_sync(
+                {
+                    "previous_snapshot_id": checkpoint.previous_snapshot_id,
+                    "added": index - carried,
+                    "removed": len(checkpoint.previous_track_ids - seen),
+                    "unchanged": carried,
+                }
+            )
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+
+def convert_playlists(
+    sp: Any,
+    youtube: Any,
+    playlist_ids: Sequence[str],
+    on_total: Optional[Callable[[int], None]] = None,
+    on_progress: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+    on_error: Optional[Callable[[str, Exception], None]] = None,
+    spotify_retry: Optional[Retrier] = None,
+    tracklists: Optional[TrackListCache] = None,
+    page_concurrency: int = DEFAULT_PAGE_CONCURRENCY,
+    **options: Any,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Convert several playlists as one job, searching each unique track once.
+
+    The playlists are walked one after another into a single track stream.
+    ``convert_tracks`` dedupes it by match key, so a track shared by
+    several playlists costs one search and its result is fanned back out to
+    every playlist it appears in. A playlist that can't be read (deleted,
+    not found, not accessible) is skipped and the rest are still converted.
+
+    Args:
+        sp: Authenticated ``spotipy.Spotify`` client
+        youtube: YouTube Data API resource
+        playlist_ids: Spotify playlist IDs; repeated IDs are converted once
+        on_total: Called with the combined item count so far each time
+            another playlist's total becomes known
+        on_progress: Called as ``on_progress(completed, row)``
+        on_error: Called as ``on_error(playlist_id, exc)`` for each playlist
+            that couldn't be read; tracks it yielded before failing are kept
+        spotify_retry: Retry policy (and circuit breaker) for the Spotify calls
+        tracklists: Shared track list cache, as in ``convert_playlist``
+        page_concurrency: Spotify pages fetched at once per playlist
+        **options: Passed through to ``convert_tracks`` (cache, quota,
+            concurrency, batch_size, verify, http_factory, retry, ...)
+
+    Yields:
+        The rows from ``convert_tracks`` plus ``playlist_id`` and the track's
+        playlist ``position``, in playlist order
+    """
+    owners: Deque[Tuple[str, int]] = deque()
+    grand_total = 0
+
+    def _add_total(total: int) -> None:
+        nonlocal grand_total
+        grand_total += total
+        if on_total is not None:
+            on_total(grand_total)
+
+    def _tracks() -> Iterator[Dict[str, Any]]:
+        for playlist_id in dict.fromkeys(playlist_ids):
+            try:
+                snapshot_id = playlist_snapshot_id(sp, playlist_id, spotify_retry) if tracklists is not None else None
+                entries = _entries(
+                    sp,
+                    playlist_id,
+                    snapshot_id,
+                    tracklists,
+                    on_total=_add_total,
+                    retry=spotify_retry,
+                    concurrency=page_concurrency,
+                )
+                for position, track in entries:
+                    owners.append((playlist_id, position))
+                    yield track
+            except Exception as exc:
+                # one bad playlist shouldn't throw away the others
+                logger.warning("Skipping playlist %s: %s", playlist_id, exc)
+                if on_error is not None:
+                    on_error(playlist_id, exc)
+
+    for row in convert_tracks(youtube, _tracks(), on_progress=on_progress, **options):
+        playlist_id, position = owners.popleft()
+        yield {**row, "playlist_id": playlist_id, "position": position}
@@ -0,0 +1,142 @@
+"""
+Streaming exporters for conversion results.
+
+Each exporter takes result rows (as yielded by ``porter.converter``) and
+yields the output text a line or a row at a time, so a large conversion can
+be written to a file or download buffer without first building the whole
+document as one string.
+
+Formats: plain text (the app's original "Track: link" list), CSV, JSON
+Lines and extended M3U with ``#EXTINF`` durations.
+"""
+
+import csv
+import io
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from porter.youtube import watch_url
+
+QUEUED = "Queued (out of quota)"
+FAILED = "Failed (convert again to retry)"
+
+CSV_COLUMNS = ("playlist", "track", "track_id", "video_id", "youtube_url", "status")
+
+Rows = Iterable[Dict[str, Any]]
+Names = Optional[Dict[str, str]]
+
+
+def row_link(row: Dict[str, Any]) -> str:
+    """Return a row's watch URL, or what to show instead when it was queued or failed."""
+    if row["queued"]:
+        return QUEUED
+    return FAILED if row.get("failed") else watch_url(row["video_id"])
+
+
+def _status(row: Dict[str, Any]) -> str:
+    if row["queued"]:
+        return "queued"
+    if row.get("failed"):
+        return "failed"
+    return "found" if row["video_id"] else "not_found"
+
+
+def _playlist(row: Dict[str, Any], names: Names) -> str:
+    playlist_id = row.get("playlist_id")
+    if not playlist_id:
+        return ""
+    return (names or {}).get(playlist_id, playlist_id)
+
+
+def iter_txt(rows: Rows, names: Names = None) -> Iterator[str]:
+    """Yield ``"Track: link"`` lines, prefixed with ``[Playlist]`` in bulk jobs."""
+    for row in rows:
+        playlist = _playlist(row, names)
+        prefix = f"[{playlist}] " if playlist else ""
+        yield f"{prefix}{row['query']}: {row_link(row)}\n"
+
+
+def iter_csv(rows: Rows, names: Names = None) -> Iterator[str]:
+    """Yield a CSV header, then one CSV record per row (see ``CSV_COLUMNS``)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def _take() -> str:
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    writer.writerow(CSV_COLUMNS)
+    yield _take()
+    for row in rows:
+        writer.writerow(
+            (
+                _playlist(row, names),
+                row["query"],
+                row.get("track_id") or "",
+                row["video_id"] or "",
+                watch_url(row["video_id"]) if row["video_id"] else "",
+                _status(row),
+            )
+        )
+        yield _take()
+
+
+def iter_jsonl(rows: Rows, names: Names = None) -> Iterator[str]:
+    """Yield each row as a JSON object with an added ``youtube_url``."""
+    for row in rows:
+        record = {**row, "youtube_url": watch_url(row["video_id"]) if row["video_id"] else None}
+        if names and row.get("playlist_id") in names:
+            record["playlist_name"] = names[row["playlist_id"]]
+        yield json.dumps(record) + "\n"
+
+
+def iter_m3u(rows: Rows, names: Names = None) -> Iterator[str]:
+    """
+    Yield an extended M3U playlist of the matched videos.
+
+    Tracks without a match are left out. ``#EXTINF`` carries the Spotify
+    track length in seconds, or -1 when it is unknown.
+    """
+    yield "#EXTM3U\n"
+    for row in rows:
+        if not row["video_id"]:
+            continue
+        duration_ms = row.get("duration_ms")
+        seconds = round(duration_ms / 1000) if duration_ms else -1
+        title = row["query"].replace("\n", " ")
+        yield f"#EXTINF:{seconds},{title}\n{watch_url(row['video_id'])}\n"
+
+
+Exporter = Callable[[Rows, Names], Iterator[str]]
+
+# name -> (exporter, file extension, MIME type)
+FORMATS: Dict[str, Tuple[Exporter, str, str]] = {
+    "txt": (iter_txt, "txt", "text/plain"),
+    "csv": (iter_csv, "csv", "text/csv"),
+    "jsonl": (iter_jsonl, "jsonl", "application/jsonl"),
+    "m3u": (iter_m3u, "m3u", "audio/x-mpegurl"),
+}
+
+
+def export_rows(rows: Rows, fmt: str, names: Names = None) -> Iterator[str]:
+    """
+    Stream result rows in one of the ``FORMATS``.
+
+    Args:
+        rows: Result rows; consumed lazily, so a generator works
+        fmt: Key of ``FORMATS``
+        names: Playlist ID -> display name for bulk jobs
+
+    Returns:
+        Iterator of text chunks that concatenate to the full document
+
+    Raises:
+        ValueError: If ``fmt`` is not a known format
+    """
+    try:
+        exporter = FORMATS[fmt][0]
+    except KeyError:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {', '.join(FORMATS)}") from None
+    return exporter(rows, names)
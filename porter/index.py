@@ -0,0 +1,366 @@
+"""
+Local fuzzy index of past matches for Playlist Porter.
+
+The match cache only answers exact repeats: the same Spotify track ID or the
+same ``match_key``. ``MatchIndex`` catches the near misses: a re-release
+filed under a slightly different title ("Song - Single Version", "Song
+(Original Mix)"), a typo or spelling fix in a title of three or more
+words, or a different artist credit order. Each resolved track is indexed
+by the tokens of its folded title and artist names. A new track is scored
+against the entries that share tokens with it, and a confident hit reuses
+the known video instead of spending a 100-unit search. Titles of one or
+two words must have exactly the same words, since "Girl" and "Girls" are
+as likely two songs as one.
+
+Words that mark a different recording ("live", "acoustic", "remix", ...)
+must agree exactly, as must numbers, arabic or roman ("Part 2", "II.
+Allegro", "Summer 2013"), and the track length (within the same tolerance
+as ``porter.verify``). A live cut never borrows the studio version's video,
+and part one never borrows part two's.
+
+The index lives in memory and is persisted as a JSON Lines file that new
+matches are appended to. The file is read on first use (or in the
+background via ``preload``), and rewritten when replaced entries make up
+most of it.
+"""
+
+import difflib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from porter.normalize import RECORDING_WORDS, fold, match_key, split_title
+from porter.telemetry import TELEMETRY
+from porter.verify import DEFAULT_TOLERANCE_RATIO, DEFAULT_TOLERANCE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = os.path.join(".porter_cache", "match_index.jsonl")
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_TTL = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 200_000
+
+# Words that make a different recording; both tracks must have the same ones
+_DISTINCT_WORDS = RECORDING_WORDS
+# Roman numerals up to 39, as in movement and part numbers; "mix" and the like don't match
+_ROMAN = re.compile(r"^(?=[ivx])x{0,3}(?:ix|iv|v?i{0,3})$")
+# Release labels that don't change the recording, ignored when comparing titles
+_NOISE_WORDS = frozenset("version edition mix mixed master mastered single album original digital bonus track".split())
+# Too common to narrow down the candidates on their own
+_STOP_WORDS = frozenset("a an and the of to in on my me you i it is feat".split())
+# Candidates scored per lookup, best token overlap first
+_MAX_CANDIDATES = 50
+# Title weight in the score, the artist overlap makes up the rest
+_TITLE_WEIGHT = 0.75
+# Primary artists must be at least this similar
+_MIN_ARTIST_SIMILARITY = 0.85
+# Titles this short must have the same words; one letter is a different song ("Girl", "Girls")
+_SHORT_TITLE_WORDS = 2
+
+
+class _Entry:
+    """One indexed match."""
+
+    __slots__ = ("key", "title", "artists", "core", "distinct", "tokens", "duration_ms", "video_id", "created")
+
+    def __init__(
+        self,
+        key: str,
+        title: str,
+        artists: List[str],
+        duration_ms: Optional[int],
+        video_id: str,
+        created: float,
+    ):
+        self.key = key
+        self.title = title
+        self.artists = artists
+        self.duration_ms = duration_ms
+        self.video_id = video_id
+        self.created = created
+        self.core = _core(title)
+        self.distinct = _distinct(self.core)
+        self.tokens = _tokens(self.core, artists)
+
+    def record(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "title": self.title,
+            "artists": self.artists,
+            "duration_ms": self.duration_ms,
+            "video_id": self.video_id,
+            "created": self.created,
+        }
+
+
+def _describe(track: Dict[str, Any]) -> Tuple[str, List[str]]:
+    """Return a track's folded bare title and folded artist names, primary first."""
+    title, featured = split_title(track.get("name") or "")
+    names = [artist.get("name") or "" for artist in track.get("artists") or []] + featured
+    artists = list(dict.fromkeys(folded for folded in map(fold, names) if folded))
+    return fold(title), artists
+
+
+def _core(title: str) -> str:
+    """Drop release labels from a folded title (``split_title`` already took the version tags)."""
+    words = [w for w in title.split() if w not in _NOISE_WORDS]
+    return " ".join(words) or title
+
+
+def _distinct(core: str) -> frozenset:
+    """Return the words two titles must share exactly: recording words and numbers."""
+    return frozenset(w for w in core.split() if w in _DISTINCT_WORDS or w.isdigit() or _ROMAN.match(w))
+
+
+def _tokens(core: str, artists: List[str]) -> Set[str]:
+    return {f"t:{w}" for w in core.split()} | {f"a:{w}" for name in artists for w in name.split()}
+
+
+def _dice(a: Set[str], b: Set[str]) -> float:
+    return 2 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+
+def _ratio(a: str, b: str) -> float:
+    return 1.0 if a == b else difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def _same_length(a: Optional[int], b: Optional[int]) -> bool:
+    if not a or not b:
+        return True
+    tolerance = max(DEFAULT_TOLERANCE_SECONDS * 1000, DEFAULT_TOLERANCE_RATIO * max(a, b))
+    return abs(a - b) <= tolerance
+
+
+def _similarity(core: str, artists: List[str], entry: _Entry) -> float:
+    """
+    Score how likely a track and an indexed entry are the same recording.
+
+    Args:
+        core: The track's folded title without release labels (``_core``)
+        artists: The track's folded artist names, primary first
+        entry: Indexed entry to compare with
+
+    Returns:
+        A score from 0 to 1; 0 when the distinguishing words, the numbers
+        or the primary artists disagree, or when a title of one or two words
+        doesn't have exactly the other's words
+    """
+    if _distinct(core) != entry.distinct:
+        return 0.0
+    if not artists or not entry.artists or _ratio(artists[0], entry.artists[0]) < _MIN_ARTIST_SIMILARITY:
+        return 0.0
+    words, entry_words = core.split(), entry.core.split()
+    title_score = _dice(set(words), set(entry_words))
+    if min(len(words), len(entry_words)) > _SHORT_TITLE_WORDS:
+        title_score = max(title_score, _ratio(core, entry.core))
+    elif title_score < 1.0:
+        return 0.0
+    artist_score = _dice(
+        {w for name in artists for w in name.split()}, {w for name in entry.artists for w in name.split()}
+    )
+    return _TITLE_WEIGHT * title_score + (1 - _TITLE_WEIGHT) * artist_score
+
+
+class MatchIndex:
+    """
+    In-memory inverted token index of resolved matches, persisted to disk.
+
+    The object is safe to share between threads and Streamlit sessions.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_INDEX_PATH,
+        threshold: float = DEFAULT_THRESHOLD,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        """
+        Set up the index; the file is not read until first use.
+
+        Args:
+            path: JSON Lines file the index is kept in, or None to keep it
+                in memory only
+            threshold: Lowest similarity score (0 to 1) accepted as a match
+            ttl: Seconds an entry stays valid after it was added
+            max_entries: Entries kept before the oldest are dropped
+        """
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._postings: Dict[str, Set[str]] = {}
+        self._lines = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def preload(self) -> None:
+        """Start reading the index file in a background thread."""
+        threading.Thread(target=self._ensure_loaded, name="porter-index-load", daemon=True).start()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._entries)
+
+    def lookup(self, track: Dict[str, Any]) -> Optional[str]:
+        """
+        Find the video of an indexed recording similar enough to ``track``.
+
+        Args:
+            track: Spotify track object (``name``, ``artists``,
+                ``duration_ms``)
+
+        Returns:
+            The best match's video ID, or None if nothing scores at least
+            ``threshold``
+        """
+        title, artists = _describe(track)
+        if not title or not artists:
+            return None
+        core = _core(title)
+        tokens = _tokens(core, artists)
+        oldest = time.time() - self.ttl
+        with TELEMETRY.span("index", "lookup"), self._lock:
+            self._load()
+            overlap: Counter = Counter()
+            for token in tokens:
+                if token[2:] not in _STOP_WORDS:
+                    overlap.update(self._postings.get(token, ()))
+            best, best_score = None, 0.0
+            for key, _ in overlap.most_common(_MAX_CANDIDATES):
+                entry = self._entries[key]
+                if entry.created < oldest or not _same_length(track.get("duration_ms"), entry.duration_ms):
+                    continue
+                score = _similarity(core, artists, entry)
+                if score > best_score:
+                    best, best_score = entry, score
+            if best is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+        logger.debug("Index match for %r: %r (%.2f)", track.get("name"), best.key, best_score)
+        return best.video_id
+
+    def add(self, track: Dict[str, Any], video_id: str) -> None:
+        """
+        Index a resolved match and append it to the file.
+
+        Adding a track whose ``match_key`` is already indexed with the same
+        video does nothing.
+
+        Args:
+            track: Spotify track object
+            video_id: The video it was matched to
+        """
+        title, artists = _describe(track)
+        if not title or not artists or not video_id:
+            return
+        key = match_key(track)
+        with self._lock:
+            self._load()
+            current = self._entries.get(key)
+            if current is not None and current.video_id == video_id:
+                return
+            entry = _Entry(key, title, artists, track.get("duration_ms"), video_id, time.time())
+            self._insert(entry)
+            self._append(entry)
+
+    def _ensure_loaded(self) -> None:
+        with self._lock:
+            self._load()
+
+    def _load(self) -> None:
+        """Read the index file once (lock held)."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        started = time.perf_counter()
+        oldest = time.time() - self.ttl
+        with open(self.path, encoding="utf-8") as fh:
+            for line in fh:
+                self._lines += 1
+                try:
+                    record = json.loads(line)
+                    entry = _Entry(
+                        record["key"],
+                        record["title"],
+                        record["artists"],
+                        record.get("duration_ms"),
+                        record["video_id"],
+                        record["created"],
+                    )
+                except (ValueError, KeyError, TypeError):
+                    # a torn last line from a crash
+                    continue
+                if entry.created >= oldest:
+                    self._insert(entry)
+        logger.info(
+            "Loaded %d indexed matches from %s in %.2fs", len(self._entries), self.path, time.perf_counter() - started
+        )
+        if self._lines > 2 * len(self._entries):
+            self._compact()
+
+    def _insert(self, entry: _Entry) -> None:
+        """Add or replace an entry in memory (lock held)."""
+        self._remove(entry.key)
+        self._entries[entry.key] = entry
+        for token in entry.tokens:
+            self._postings.setdefault(token, set()).add(entry.key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for token in entry.tokens:
+            keys = self._postings.get(token)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[token]
+
+    def _append(self, entry: _Entry) -> None:
+        """Persist a new entry, compacting the file once it is mostly stale (lock held)."""
+        if not self.path:
+            return
+        if self._lines + 1 > 2 * len(self._entries) + _MAX_CANDIDATES:
+            self._compact()
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(entry.record()) + "\n")
+            self._lines += 1
+        except OSError as exc:
+            logger.warning("Could not save index entry to %s: %s", self.path, exc)
+
+    def _compact(self) -> None:
+        """Rewrite the file with only the live entries (lock held)."""
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as fh:
+                for entry in self._entries.values():
+                    fh.write(json.dumps(entry.record()) + "\n")
+            os.replace(tmp, self.path)
+            self._lines = len(self._entries)
+        except OSError as exc:
+            logger.warning("Could not compact index file %s: %s", self.path, exc)
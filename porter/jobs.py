@@ -0,0 +1,176 @@
+"""
+Background conversion jobs for Playlist Porter.
+
+Streamlit stops the script thread on every rerun, which used to kill a
+conversion halfway through. Conversions now run on a process-wide
+``JobManager`` worker pool instead. Each job has an ID and a progress record
+that any script run (including one for a refreshed page) can read to
+re-attach to it.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_JOBS = 4
+DEFAULT_KEEP_SECONDS = 3600
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETE = "complete"
+FAILED = "failed"
+
+
+class Job:
+    """
+    Progress record of one background conversion.
+
+    The worker writes to it through ``set_total``, ``set_message`` and
+    ``add_row``; readers take consistent views with ``rows_since`` and the
+    read-only properties. All methods are thread-safe.
+    """
+
+    def __init__(self, label: str = "", owner: Optional[str] = None):
+        """
+        Initialize the job record.
+
+        Args:
+            label: Human-readable description, e.g. the playlist URL
+            owner: Who started the job, e.g. their Spotify user ID; only
+                they should be shown its rows
+        """
+        self.id = uuid.uuid4().hex
+        self.label = label
+        self.owner = owner
+        self.status = PENDING
+        self.message = "Waiting for a free worker..."
+        self.total: Optional[int] = None
+        self.error: Optional[str] = None
+        self.info: Dict[str, Any] = {}
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self._rows: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def set_total(self, total: int) -> None:
+        """Record how many tracks the job expects to produce."""
+        with self._lock:
+            self.total = total
+
+    def set_message(self, message: str) -> None:
+        """Update the status line shown to the user."""
+        with self._lock:
+            self.message = message
+
+    def set_info(self, key: str, value: Any) -> None:
+        """Attach an extra piece of information for the UI, e.g. a sync summary."""
+        with self._lock:
+            self.info[key] = value
+
+    def add_row(self, row: Dict[str, Any]) -> None:
+        """Append a result row."""
+        with self._lock:
+            self._rows.append(row)
+
+    def rows_since(self, start: int) -> List[Dict[str, Any]]:
+        """Return the rows produced after the first ``start`` ones."""
+        with self._lock:
+            return self._rows[start:]
+
+    @property
+    def rows(self) -> List[Dict[str, Any]]:
+        """A copy of every row produced so far."""
+        return self.rows_since(0)
+
+    @property
+    def done(self) -> bool:
+        """True once the job has completed or failed."""
+        return self.status in (COMPLETE, FAILED)
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded pool of background threads and keeps their records.
+
+    Finished jobs are kept for ``keep_seconds`` so a refreshed page can still
+    show their results, then dropped.
+    """
+
+    def __init__(self, max_jobs: int = DEFAULT_MAX_JOBS, keep_seconds: float = DEFAULT_KEEP_SECONDS):
+        """
+        Initialize the manager.
+
+        Args:
+            max_jobs: Jobs that may run at once; later ones wait as pending
+            keep_seconds: How long finished job records are kept
+        """
+        self.keep_seconds = keep_seconds
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="porter-job")
+
+    def submit(
+        self, fn: Callable[..., None], *args: Any, label: str = "", owner: Optional[str] = None, **kwargs: Any
+    ) -> Job:
+        """
+        Start ``fn(job, *args, **kwargs)`` in the background.
+
+        ``fn`` reports progress through the ``Job`` it is given. If it raises,
+        the job is marked failed with the error message. ``label`` and
+        ``owner`` are recorded on the job (see ``Job``).
+
+        Returns:
+            The new job record
+        """
+        job = Job(label, owner)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        """Return the job with this ID, or None if it is unknown or expired."""
+        with self._lock:
+            return self._jobs.get(job_id) if job_id else None
+
+    def latest_for(self, owner: Optional[str]) -> Optional[Job]:
+        """
+        Return the most recently started job of ``owner``.
+
+        Lets a page that lost the job ID (a refresh means logging in again,
+        and the login redirect drops the URL parameters) find its job again.
+
+        Returns:
+            The job, or None if ``owner`` is empty or has no kept jobs
+        """
+        if not owner:
+            return None
+        with self._lock:
+            self._prune()
+            jobs = [job for job in self._jobs.values() if job.owner == owner]
+        return max(jobs, key=lambda job: job.created) if jobs else None
+
+    def _run(self, job: Job, fn: Callable[..., None], args: Any, kwargs: Any) -> None:
+        job.status = RUNNING
+        job.set_message("Starting...")
+        try:
+            fn(job, *args, **kwargs)
+        except Exception as exc:
+            logger.exception("Job %s failed", job.id)
+            job.error = str(exc)
+            job.status = FAILED
+        else:
+            job.status = COMPLETE
+        finally:
+            job.finished = time.time()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.keep_seconds
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished < cutoff]:
+            del self._jobs[job_id]
@@ -0,0 +1,172 @@
+"""
+YouTube API key pool for Playlist Porter.
+
+A single key's daily quota covers about 100 searches. ``KeyPool`` spreads
+work over several keys: each call is charged to the key with the most
+headroom left today (per the shared ``QuotaLedger``), and a key that
+answers ``quotaExceeded`` is rested for a cooldown period while the others
+carry on. The pool implements the same interface as ``QuotaAccount``, so
+the converter treats one key and many keys alike.
+
+Keys come from ``YOUTUBE_API_KEY``, ``YOUTUBE_API_KEYS`` (comma or
+whitespace separated) and the file named by ``YOUTUBE_API_KEYS_FILE`` (one
+key per line, ``#`` starts a comment). See ``load_api_keys``.
+"""
+
+import datetime
+import logging
+import re
+import threading
+import time
+from typing import Dict, List, Mapping, Optional, Sequence
+
+from porter.quota import _PACIFIC, QuotaLedger, key_id
+
+logger = logging.getLogger(__name__)
+
+_SEPARATORS = re.compile(r"[\s,]+")
+
+
+def load_api_keys(environ: Mapping[str, str]) -> List[str]:
+    """
+    Collect YouTube API keys from the environment.
+
+    Args:
+        environ: Environment mapping, usually ``os.environ``
+
+    Returns:
+        Unique keys in the order given: ``YOUTUBE_API_KEY`` first, then
+        ``YOUTUBE_API_KEYS``, then the lines of ``YOUTUBE_API_KEYS_FILE``
+
+    Raises:
+        OSError: If ``YOUTUBE_API_KEYS_FILE`` is set but cannot be read
+    """
+    keys = [environ.get("YOUTUBE_API_KEY", "")]
+    keys += _SEPARATORS.split(environ.get("YOUTUBE_API_KEYS", ""))
+    path = environ.get("YOUTUBE_API_KEYS_FILE", "").strip()
+    if path:
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                keys += _SEPARATORS.split(line.split("#", 1)[0])
+    return list(dict.fromkeys(key.strip() for key in keys if key.strip()))
+
+
+def seconds_until_reset() -> float:
+    """Return the seconds left until the next midnight Pacific time."""
+    now = datetime.datetime.now(_PACIFIC)
+    midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time(), now.tzinfo)
+    return max(0.0, (midnight - now).total_seconds())
+
+
+class KeyPool:
+    """
+    Several API keys sharing one ``QuotaLedger``.
+
+    The object is safe to share between threads and Streamlit sessions.
+    """
+
+    def __init__(self, api_keys: Sequence[str], ledger: QuotaLedger, cooldown: Optional[float] = None):
+        """
+        Initialize the pool.
+
+        Args:
+            api_keys: YouTube API keys; duplicates are ignored
+            ledger: Ledger the units are recorded in
+            cooldown: Seconds a key rests after ``quotaExceeded``; by default
+                until the next daily reset
+
+        Raises:
+            ValueError: If no keys are given
+        """
+        self.api_keys = list(dict.fromkeys(api_keys))
+        if not self.api_keys:
+            raise ValueError("KeyPool needs at least one API key")
+        self.ledger = ledger
+        self.cooldown = cooldown
+        self._resting: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _available(self) -> List[str]:
+        now = time.time()
+        with self._lock:
+            return [key for key in self.api_keys if self._resting.get(key, 0.0) <= now]
+
+    @property
+    def remaining(self) -> int:
+        """Units left today across the keys that are not cooling down."""
+        return sum(self.ledger.remaining(key) for key in self._available())
+
+    def reserve(self, method: str, count: int = 1) -> Optional[str]:
+        """
+        Charge ``count`` calls of ``method`` to the key with the most headroom.
+
+        Args:
+            method: API method name, e.g. ``"search.list"``
+            count: Number of calls, all made with the returned key
+
+        Returns:
+            The key the units were reserved on, or None if no available key
+            can afford them
+        """
+        by_headroom = sorted(self._available(), key=self.ledger.remaining, reverse=True)
+        for key in by_headroom:
+            # another thread may have spent the headroom since it was read
+            if self.ledger.try_spend(key, method, count):
+                return key
+        return None
+
+    def try_spend(self, method: str, count: int = 1) -> bool:
+        """Reserve units for ``count`` calls of ``method`` on any key; False if none can."""
+        return self.reserve(method, count) is not None
+
+    def exhaust(self, api_key: Optional[str] = None) -> None:
+        """
+        Rest a key that reported ``quotaExceeded``.
+
+        Without a ``cooldown`` the key is also marked spent for the day in
+        the ledger, so a restarted app or a new CLI run skips it too.
+
+        Args:
+            api_key: The key that was rejected; None rests every key
+        """
+        until = time.time() + (self.cooldown if self.cooldown is not None else seconds_until_reset())
+        keys = [api_key] if api_key is not None else self.api_keys
+        with self._lock:
+            for key in keys:
+                self._resting[key] = until
+        if self.cooldown is None:
+            # resting until the reset is what the ledger records, so it survives a restart
+            for key in keys:
+                self.ledger.exhaust(key)
+            return
+        for key in keys:
+            logger.warning(
+                "YouTube API key %s reported quotaExceeded; resting it until %s",
+                key_id(key),
+                time.strftime("%H:%M:%S", time.localtime(until)),
+            )
+
+    def usage(self) -> List[Dict[str, object]]:
+        """
+        Report per-key usage for operators.
+
+        Returns:
+            One dictionary per key with ``key`` (a short hash, never the key
+            itself), ``spent`` and ``remaining`` units today, and
+            ``resting_until`` (a Unix time, or None when the key is usable)
+        """
+        now = time.time()
+        with self._lock:
+            resting = dict(self._resting)
+        report = []
+        for key in self.api_keys:
+            until = resting.get(key, 0.0)
+            report.append(
+                {
+                    "key": key_id(key),
+                    "spent": self.ledger.spent(key),
+                    "remaining": self.ledger.remaining(key),
+                    "resting_until": until if until > now else None,
+                }
+            )
+        return report
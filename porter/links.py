@@ -0,0 +1,36 @@
+"""
+Zero-quota YouTube playlist links.
+
+Creating a real YouTube playlist costs 50 quota units per track and needs
+OAuth. ``watch_videos`` URLs instead play a list of video IDs as an
+anonymous playlist, for free and without signing in. YouTube only accepts
+a limited number of IDs per link, so longer playlists are split across
+several links.
+"""
+
+from typing import Iterable, List, Optional
+
+WATCH_VIDEOS_URL = "https://www.youtube.com/watch_videos?video_ids={}"
+
+# Most video IDs YouTube will play from one watch_videos link
+MAX_VIDEOS_PER_LINK = 50
+
+
+def playlist_links(video_ids: Iterable[Optional[str]], chunk_size: int = MAX_VIDEOS_PER_LINK) -> List[str]:
+    """
+    Pack video IDs into anonymous YouTube playlist links.
+
+    Args:
+        video_ids: Matched video IDs in playlist order; None entries (tracks
+            that were not found) are skipped
+        chunk_size: IDs per link, capped at ``MAX_VIDEOS_PER_LINK``
+
+    Returns:
+        ``watch_videos`` URLs that together play every video in order
+    """
+    chunk_size = min(max(1, chunk_size), MAX_VIDEOS_PER_LINK)
+    ids = [video_id for video_id in video_ids if video_id]
+    return [
+        WATCH_VIDEOS_URL.format(",".join(ids[start:start + chunk_size]))
+        for start in range(0, len(ids), chunk_size)
+    ]
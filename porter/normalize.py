@@ -0,0 +1,116 @@
+"""
+Track title and artist normalization for Playlist Porter.
+
+The same recording shows up on Spotify under many spellings: "Song -
+Remastered 2011", "Song (2011 Remaster)", "Song (feat. X)", accented and
+unaccented artist names, and so on. ``match_key`` reduces a track to a
+canonical form so all of those variants share one cache entry and one
+YouTube search. The key is only used for matching; the query shown to users
+and sent to YouTube still comes from ``porter.spotify.track_query``.
+
+Tags that change the recording itself ("Live", "Acoustic", "Remix") are kept,
+so those versions still get their own searches, even when they share a tag
+with a release label ("Live / Remastered 2011" keeps "Live").
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, List, Tuple
+
+# Words that mark a re-release or an alternative cut of the same recording
+_VERSION_WORDS = (
+    r"re-?master(?:ed)?(?:\s+version)?"
+    r"|deluxe(?:\s+edition)?|expanded(?:\s+edition)?|anniversary(?:\s+edition)?"
+    r"|single\s+version|album\s+version|radio\s+(?:edit|version)|original\s+version"
+    r"|mono(?:\s+version)?|stereo(?:\s+version)?|bonus\s+track"
+)
+_FEAT_WORDS = r"feat\.?|ft\.?|featuring|with"
+# Folded words that make a different recording of the same song
+RECORDING_WORDS = frozenset(
+    (
+        "live acoustic unplugged remix remixed rmx instrumental karaoke demo cover "
+        "orchestral symphonic piano slowed sped reverb nightcore extended dub session sessions"
+    ).split()
+)
+_RECORDING = re.compile(rf"\b(?:{'|'.join(sorted(RECORDING_WORDS))})\b", re.IGNORECASE)
+# The release label itself, and any year, within a version tag
+_VERSION_LABEL = re.compile(rf"\b(?:{_VERSION_WORDS})\b|\b(?:19|20)\d\d\b", re.IGNORECASE)
+
+# "(feat. X)" or "[with X & Y]"
+_FEAT_BRACKET = re.compile(rf"[(\[]\s*(?:{_FEAT_WORDS})\s+([^)\]]+)[)\]]", re.IGNORECASE)
+# a trailing "feat. X" without brackets; "with" is too common in titles to strip here
+_FEAT_TRAILING = re.compile(r"\s+(?:feat\.?|ft\.?|featuring)\s+(.+)$", re.IGNORECASE)
+# "(Remastered 2011)", "[2009 Remaster]", "(Deluxe Edition)"
+_VERSION_BRACKET = re.compile(rf"[(\[][^)\]]*\b(?:{_VERSION_WORDS})\b[^)\]]*[)\]]", re.IGNORECASE)
+# " - Remastered 2011", " - 2009 Remaster", " - Radio Edit"
+_VERSION_DASH = re.compile(rf"\s+-\s+[^-]*\b(?:{_VERSION_WORDS})\b[^-]*$", re.IGNORECASE)
+_ARTIST_SEPARATOR = re.compile(r"\s*(?:,|&)\s*")
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def fold(text: str) -> str:
+    """
+    Fold case, accents and punctuation so spelling variants compare equal.
+
+    ``"Beyoncé"``, ``"BEYONCE"`` and ``"beyonce!"`` all become ``"beyonce"``.
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", stripped.casefold()).replace("_", " ").strip()
+
+
+def split_title(title: str) -> Tuple[str, List[str]]:
+    """
+    Strip version and featuring tags from a track title.
+
+    A version tag that also names a different recording ("Live",
+    "Remix", ...) keeps those words and loses only the release label.
+
+    Args:
+        title: Track title as Spotify returns it
+
+    Returns:
+        ``(title, featured)``: the bare title and the artist names listed
+        in its featuring tags, both unfolded
+    """
+    featured: List[str] = []
+
+    def _take(match: "re.Match[str]") -> str:
+        featured.extend(name for name in _ARTIST_SEPARATOR.split(match.group(1)) if name)
+        return ""
+
+    def _strip_version(match: "re.Match[str]") -> str:
+        tag = match.group(0)
+        # "(Live - Remastered 2011)" is still the live cut, only the label goes
+        return _VERSION_LABEL.sub("", tag) if _RECORDING.search(tag) else ""
+
+    title = _FEAT_BRACKET.sub(_take, title)
+    title = _FEAT_TRAILING.sub(_take, title)
+    title = _VERSION_BRACKET.sub(_strip_version, title)
+    title = _VERSION_DASH.sub(_strip_version, title)
+    return title.strip(), featured
+
+
+def match_key(track: Dict[str, Any]) -> str:
+    """
+    Build the canonical matching key for a Spotify track.
+
+    The key is the folded bare title, the folded primary artist and the
+    sorted set of featured artists, whether Spotify lists them as extra
+    artists or only in the title.
+
+    Args:
+        track: Spotify track object (``name`` and ``artists``)
+
+    Returns:
+        A string such as ``"song - artist feat a, b"``
+    """
+    title, featured = split_title(track.get("name") or "")
+    names = [artist.get("name") or "" for artist in track.get("artists") or []]
+    primary = fold(names[0]) if names else ""
+    guests = {fold(name) for name in names[1:] + featured} - {primary, ""}
+
+    key = f"{fold(title)} - {primary}"
+    if guests:
+        key += " feat " + ", ".join(sorted(guests))
+    return key
@@ -0,0 +1,276 @@
+"""
+Staged pipeline engine for Playlist Porter.
+
+A ``Pipeline`` pulls items from a source iterable on its own thread and
+pushes them through a chain of ``Stage`` objects. Each stage runs on its own
+pool of worker threads, and consecutive stages are joined by bounded queues,
+so a slow stage makes the stages before it wait (backpressure) instead of
+letting work pile up in memory. Every stage keeps timing counters, which
+show where a conversion spends its time and which stage is the bottleneck.
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 16
+
+# How often blocked threads wake up to check whether the pipeline stopped
+_POLL_SECONDS = 0.1
+
+_END = object()
+
+Emit = Callable[[Any], None]
+
+
+class StageStats:
+    """
+    Timing counters for one stage.
+
+    Attributes:
+        name: Stage name
+        workers: Number of worker threads
+        items: Items the stage has processed
+        busy: Seconds spent inside the stage function, summed over workers
+        waiting: Seconds workers spent waiting for input
+        blocked: Seconds workers spent waiting for room in the next queue
+    """
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.waiting = 0.0
+        self.blocked = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, items: int = 0, busy: float = 0.0, waiting: float = 0.0, blocked: float = 0.0) -> None:
+        """Add to the counters (thread-safe)."""
+        with self._lock:
+            self.items += items
+            self.busy += busy
+            self.waiting += waiting
+            self.blocked += blocked
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return the counters as a plain dictionary.
+
+        ``busy_per_worker`` is the stage's effective wall-clock cost; the
+        stage with the highest value is the bottleneck.
+        """
+        with self._lock:
+            return {
+                "stage": self.name,
+                "workers": self.workers,
+                "items": self.items,
+                "busy_s": round(self.busy, 4),
+                "busy_per_worker_s": round(self.busy / max(1, self.workers), 4),
+                "waiting_s": round(self.waiting, 4),
+                "blocked_s": round(self.blocked, 4),
+            }
+
+
+class Stage:
+    """
+    One step of a pipeline.
+
+    ``process(item, emit)`` is called for each input item and may call
+    ``emit`` any number of times to pass results on. Optional hooks let
+    stateful stages (such as batching) push out what they are holding:
+    ``flush(emit)`` runs once after the last input item, and ``idle(emit)``
+    runs whenever no input arrived for ``idle_timeout`` seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        process: Callable[[Any, Emit], None],
+        workers: int = 1,
+        flush: Optional[Callable[[Emit], None]] = None,
+        idle: Optional[Callable[[Emit], None]] = None,
+        idle_timeout: Optional[float] = None,
+    ):
+        """
+        Initialize the stage.
+
+        Args:
+            name: Stage name, used for thread names and stats
+            process: Called as ``process(item, emit)`` for each input item
+            workers: Worker threads; stages holding state between items
+                must use 1
+            flush: Called as ``flush(emit)`` after the last item
+            idle: Called as ``idle(emit)`` after ``idle_timeout`` seconds
+                without input
+            idle_timeout: Seconds of silence before ``idle`` runs; by default
+                it runs on every internal poll (about every 0.1 s) without input
+        """
+        self.name = name
+        self.process = process
+        self.workers = max(1, int(workers))
+        self.flush = flush
+        self.idle = idle
+        self.idle_timeout = idle_timeout
+
+
+class Pipeline:
+    """
+    Runs a source and a chain of stages on background threads.
+
+    Iterate over the pipeline to receive the last stage's output in arrival
+    order. If any stage raises, the pipeline stops and the error is
+    re-raised to the consumer. Closing the iterator early stops every
+    thread.
+    """
+
+    def __init__(
+        self,
+        source: Iterable[Any],
+        stages: List[Stage],
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        source_name: str = "source",
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            source: Input items; iterated on a dedicated thread, so it may
+                block on I/O (e.g. fetching pages)
+            stages: Stages in order
+            queue_size: Capacity of each queue between stages
+            source_name: Name of the source in the stats
+        """
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stats: Dict[str, StageStats] = {source_name: StageStats(source_name, 1)}
+        for stage in stages:
+            self.stats[stage.name] = StageStats(stage.name, stage.workers)
+        self._source_name = source_name
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+        self._remaining = [stage.workers for stage in stages]
+        self._lock = threading.Lock()
+
+    def _put(self, q: "queue.Queue[Any]", item: Any, stats: StageStats) -> None:
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                break
+            except queue.Full:
+                continue
+        stats.add(blocked=time.perf_counter() - start)
+
+    def _fail(self, exc: BaseException) -> None:
+        with self._lock:
+            self._errors.append(exc)
+        self._stop.set()
+
+    def _run_source(self) -> None:
+        stats = self.stats[self._source_name]
+        out = self._queues[0]
+        iterator: Any = None
+        try:
+            iterator = iter(self.source)
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                stats.add(items=1, busy=time.perf_counter() - start)
+                self._put(out, item, stats)
+        except BaseException as exc:
+            self._fail(exc)
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        self._put(out, _END, stats)
+
+    def _run_stage(self, index: int) -> None:
+        stage = self.stages[index]
+        stats = self.stats[stage.name]
+        inbox, out = self._queues[index], self._queues[index + 1]
+
+        blocked = 0.0
+
+        def emit(item: Any) -> None:
+            nonlocal blocked
+            start = time.perf_counter()
+            self._put(out, item, stats)
+            blocked += time.perf_counter() - start
+
+        try:
+            last_input = time.perf_counter()
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                try:
+                    item = inbox.get(timeout=_POLL_SECONDS)
+                except queue.Empty:
+                    stats.add(waiting=time.perf_counter() - start)
+                    idle_for = time.perf_counter() - last_input
+                    if stage.idle is not None and idle_for >= (stage.idle_timeout or 0):
+                        stage.idle(emit)
+                        last_input = time.perf_counter()
+                    continue
+                stats.add(waiting=time.perf_counter() - start)
+                last_input = time.perf_counter()
+
+                if item is _END:
+                    with self._lock:
+                        self._remaining[index] -= 1
+                        last = self._remaining[index] == 0
+                    if not last:
+                        # let the sibling workers see the end marker too
+                        self._put(inbox, _END, stats)
+                        return
+                    if stage.flush is not None:
+                        stage.flush(emit)
+                    emit(_END)
+                    return
+
+                start, blocked = time.perf_counter(), 0.0
+                stage.process(item, emit)
+                # time spent blocked in emit() is already counted as blocked
+                stats.add(items=1, busy=time.perf_counter() - start - blocked)
+        except BaseException as exc:
+            logger.debug("Pipeline stage %s failed: %s", stage.name, exc)
+            self._fail(exc)
+
+    def __iter__(self) -> Iterator[Any]:
+        threads = [threading.Thread(target=self._run_source, name=f"porter-{self._source_name}", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                threads.append(
+                    threading.Thread(
+                        target=self._run_stage, args=(index,), name=f"porter-{stage.name}-{n}", daemon=True
+                    )
+                )
+        for thread in threads:
+            thread.start()
+
+        results = self._queues[-1]
+        try:
+            while True:
+                try:
+                    item = results.get(timeout=_POLL_SECONDS)
+                except queue.Empty:
+                    if self._stop.is_set():
+                        break
+                    continue
+                if item is _END:
+                    break
+                yield item
+            if self._errors:
+                raise self._errors[0]
+        finally:
+            self._stop.set()
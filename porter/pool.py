@@ -0,0 +1,29 @@
+"""
+Per-thread resources for the conversion stages.
+
+HTTP transports are not safe to share between worker threads, so each
+worker builds its own on first use through ``per_thread``.
+"""
+
+import threading
+from typing import Any, Callable, Optional
+
+
+def per_thread(factory: Optional[Callable[[], Any]]) -> Callable[[], Any]:
+    """
+    Return a getter that lazily builds one ``factory()`` object per thread.
+
+    Used for HTTP transports, which are not safe to share between workers.
+    With no factory the getter always returns None.
+    """
+    local = threading.local()
+
+    def get() -> Any:
+        if factory is None:
+            return None
+        value = getattr(local, "value", None)
+        if value is None:
+            value = local.value = factory()
+        return value
+
+    return get
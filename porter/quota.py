@@ -0,0 +1,161 @@
+"""
+YouTube Data API quota accounting for Playlist Porter.
+
+Every API method has a fixed unit cost and each key gets a daily allowance
+that resets at midnight Pacific time. ``QuotaLedger`` records units spent per
+key per day in a small SQLite file so the count survives restarts, and lets
+the converter stop searching (and queue the remaining tracks) before the API
+starts rejecting requests.
+"""
+
+import datetime
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = os.path.join(".porter_cache", "quota.sqlite3")
+DEFAULT_DAILY_QUOTA = 10_000
+
+# Unit cost of each YouTube Data API v3 method
+# https://developers.google.com/youtube/v3/determine_quota_cost
+COSTS: Dict[str, int] = {
+    "search.list": 100,
+    "videos.list": 1,
+    "channels.list": 1,
+    "playlists.list": 1,
+    "playlistItems.list": 1,
+    "playlists.insert": 50,
+    "playlistItems.insert": 50,
+}
+
+try:
+    from zoneinfo import ZoneInfo
+
+    _PACIFIC = ZoneInfo("America/Los_Angeles")
+except Exception:  # no tz database available, close enough outside DST
+    _PACIFIC = datetime.timezone(datetime.timedelta(hours=-8))
+
+
+def quota_day() -> str:
+    """Return the current quota day (the date in US Pacific time)."""
+    return datetime.datetime.now(_PACIFIC).date().isoformat()
+
+
+def key_id(api_key: str) -> str:
+    """Return a short stable identifier for an API key, safe to store and display."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+class QuotaLedger:
+    """
+    Per-key, per-day record of YouTube API units spent.
+
+    The object is safe to share between threads and Streamlit sessions.
+    """
+
+    def __init__(self, path: str = DEFAULT_LEDGER_PATH, daily_limit: int = DEFAULT_DAILY_QUOTA):
+        """
+        Open (or create) the ledger file.
+
+        Args:
+            path: SQLite file path, or ``":memory:"``
+            daily_limit: Units each key may spend per quota day
+        """
+        self.path = path
+        self.daily_limit = daily_limit
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and path != ":memory:":
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS quota ("
+            " day TEXT NOT NULL,"
+            " key_id TEXT NOT NULL,"
+            " spent INTEGER NOT NULL,"
+            " PRIMARY KEY (day, key_id))"
+        )
+
+    def _spent(self, kid: str, day: str) -> int:
+        row = self._conn.execute(
+            "SELECT spent FROM quota WHERE day = ? AND key_id = ?", (day, kid)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _set(self, kid: str, day: str, spent: int) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO quota (day, key_id, spent) VALUES (?, ?, ?)", (day, kid, spent)
+        )
+
+    def spent(self, api_key: str) -> int:
+        """Units spent by ``api_key`` so far today."""
+        with self._lock:
+            return self._spent(key_id(api_key), quota_day())
+
+    def remaining(self, api_key: str) -> int:
+        """Units ``api_key`` has left today."""
+        return max(0, self.daily_limit - self.spent(api_key))
+
+    def try_spend(self, api_key: str, method: str, count: int = 1) -> bool:
+        """
+        Reserve the units for ``count`` calls of ``method`` if the budget allows.
+
+        Args:
+            api_key: Key the calls will be made with
+            method: API method name, e.g. ``"search.list"``
+            count: Number of calls
+
+        Returns:
+            True if the units were reserved, False if today's budget is too
+            small (nothing is recorded in that case)
+        """
+        cost = COSTS[method] * count
+        kid, day = key_id(api_key), quota_day()
+        with self._lock:
+            spent = self._spent(kid, day)
+            if spent + cost > self.daily_limit:
+                return False
+            self._set(kid, day, spent + cost)
+            return True
+
+    def exhaust(self, api_key: str) -> None:
+        """Mark ``api_key`` as out of quota for the rest of today."""
+        kid, day = key_id(api_key), quota_day()
+        with self._lock:
+            self._set(kid, day, max(self.daily_limit, self._spent(kid, day)))
+        logger.warning("YouTube API key %s reported quotaExceeded; paused until the daily reset", kid)
+
+    def account(self, api_key: str) -> "QuotaAccount":
+        """Return a view of the ledger bound to one API key."""
+        return QuotaAccount(self, api_key)
+
+
+class QuotaAccount:
+    """A ``QuotaLedger`` bound to a single API key, as used by the converter."""
+
+    def __init__(self, ledger: QuotaLedger, api_key: str):
+        self.ledger = ledger
+        self.api_key = api_key
+
+    @property
+    def remaining(self) -> int:
+        """Units left today."""
+        return self.ledger.remaining(self.api_key)
+
+    def try_spend(self, method: str, count: int = 1) -> bool:
+        """Reserve units for ``count`` calls of ``method``; False if over budget."""
+        return self.ledger.try_spend(self.api_key, method, count)
+
+    def reserve(self, method: str, count: int = 1) -> Optional[str]:
+        """Like ``try_spend``, but return the key charged (or None), as ``KeyPool`` does."""
+        return self.api_key if self.try_spend(method, count) else None
+
+    def exhaust(self, api_key: Optional[str] = None) -> None:
+        """Mark the key as out of quota for the rest of today."""
+        self.ledger.exhaust(self.api_key)
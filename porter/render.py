@@ -0,0 +1,70 @@
+"""
+Batched row rendering for the results table.
+
+Re-sending the whole results table after every track makes rendering cost
+grow with the square of the playlist length. ``RowBatcher`` collects rows and
+hands them to a flush callback in batches, either once ``batch_size`` rows
+have accumulated or once ``interval`` seconds have passed, so the caller can
+append just the new rows.
+"""
+
+import time
+from typing import Any, Callable, Dict, List
+
+DEFAULT_BATCH_SIZE = 25
+DEFAULT_FLUSH_INTERVAL = 0.5
+
+
+class RowBatcher:
+    """
+    Buffer result rows and flush them in batches.
+
+    Use as a context manager so the last partial batch is flushed on exit.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[List[Dict[str, Any]]], None],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            flush: Called with each batch of new rows
+            batch_size: Flush once this many rows are buffered (0 disables)
+            interval: Flush once this many seconds have passed since the last
+                flush (0 disables)
+        """
+        self._flush = flush
+        self.batch_size = batch_size
+        self.interval = interval
+        self._rows: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+
+    def add(self, row: Dict[str, Any]) -> None:
+        """Buffer a row, flushing if the batch is full or the interval has passed."""
+        self._rows.append(row)
+        if self.batch_size and len(self._rows) >= self.batch_size:
+            self.flush()
+        elif self.interval and time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def poll(self) -> None:
+        """Flush if the interval has passed, even when no new row arrived."""
+        if self.interval and time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Hand any buffered rows to the flush callback."""
+        self._last_flush = time.monotonic()
+        if self._rows:
+            rows, self._rows = self._rows, []
+            self._flush(rows)
+
+    def __enter__(self) -> "RowBatcher":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.flush()
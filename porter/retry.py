@@ -0,0 +1,270 @@
+"""
+Retries and circuit breaking for Playlist Porter's API calls.
+
+``Retrier`` re-runs a call that failed with a transient error (HTTP 429 and
+5xx, dropped connections, timeouts) after a jittered exponential backoff,
+waiting at least as long as the server's ``Retry-After`` header asks. Each
+retrier can share a ``CircuitBreaker`` with every other caller of the same
+backend: after enough consecutive transient failures the breaker opens and
+calls fail at once with ``CircuitOpenError`` instead of piling more
+requests onto a service that is down. After a cool-off one trial call is let
+through, and its outcome closes or re-opens the breaker.
+
+Errors from ``googleapiclient`` and ``spotipy`` are recognised by their
+attributes, so neither library is imported here.
+"""
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Statuses worth retrying: rate limiting and server-side failures
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+DEFAULT_ATTEMPTS = 4
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 30.0
+DEFAULT_FAILURE_THRESHOLD = 8
+DEFAULT_RESET_TIMEOUT = 30.0
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose circuit breaker is open."""
+
+
+def http_status(exc: BaseException) -> Optional[int]:
+    """Return the HTTP status of an API error, if it carries one."""
+    resp = getattr(exc, "resp", None)  # googleapiclient.errors.HttpError
+    status = getattr(resp, "status", None)
+    if status is None:
+        status = getattr(exc, "http_status", None)  # spotipy.SpotifyException
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_transient(exc: BaseException) -> bool:
+    """
+    Return True if ``exc`` is worth retrying.
+
+    That is an HTTP error with a status in ``RETRY_STATUSES``, or a
+    connection-level failure (socket errors, timeouts, ``requests`` and
+    ``httplib2`` transport errors).
+    """
+    status = http_status(exc)
+    if status is not None:
+        return status in RETRY_STATUSES
+    if isinstance(exc, (OSError, TimeoutError)):
+        return True
+    return type(exc).__module__.split(".")[0] in ("httplib2", "requests", "urllib3")
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Return the delay in seconds the server asked for via ``Retry-After``, if any."""
+    headers = getattr(exc, "headers", None) or getattr(exc, "resp", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+    except AttributeError:
+        return None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(str(value))
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one backend.
+
+    The object is safe to share between threads and Streamlit sessions.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+    ):
+        """
+        Initialize the breaker.
+
+        Args:
+            name: Backend name, used in errors and logs
+            failure_threshold: Consecutive transient failures that open it
+            reset_timeout: Seconds it stays open before a trial call
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """The breaker's current state: ``CLOSED``, ``OPEN`` or ``HALF_OPEN``."""
+        with self._lock:
+            if self.opened_at is None:
+                return self.CLOSED
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self.OPEN
+
+    def allow(self) -> None:
+        """
+        Check that a call may go ahead.
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with its
+                trial call already in flight
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return
+            waited = time.monotonic() - self.opened_at
+            if waited >= self.reset_timeout and not self._trial:
+                self._trial = True
+                return
+        raise CircuitOpenError(f"{self.name} is unavailable, retrying in {max(0.0, self.reset_timeout - waited):.0f}s")
+
+    def record_success(self) -> None:
+        """Note a call that reached the backend; closes the breaker."""
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("%s is back, closing its circuit breaker", self.name)
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        """Note a transient failure; opens the breaker at the threshold."""
+        with self._lock:
+            self.failures += 1
+            if self._trial or (self.opened_at is None and self.failures >= self.failure_threshold):
+                if self.opened_at is None:
+                    logger.warning("%s failed %d times in a row, opening its circuit breaker", self.name, self.failures)
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+
+class Retrier:
+    """
+    Retry policy for one backend, optionally guarded by a circuit breaker.
+
+    The object is safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        attempts: int = DEFAULT_ATTEMPTS,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        breaker: Optional[CircuitBreaker] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            name: Backend name, used in logs
+            attempts: Tries per call, the first one included
+            base_delay: Backoff ceiling in seconds before the first retry;
+                doubles for each further retry
+            max_delay: Longest single wait. A ``Retry-After`` longer than
+                this fails the call instead of stalling it
+            breaker: Circuit breaker shared by every caller of the backend
+            sleep: Sleep function (replaceable in benchmarks)
+        """
+        self.name = name
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self.retries = 0
+        self._sleep = sleep
+        self._random = random.Random()
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt: int) -> float:
+        """Return a "full jitter" delay for retry number ``attempt`` (1-based)."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        with self._lock:
+            return self._random.uniform(0, ceiling)
+
+    def call(
+        self,
+        fn: Callable[..., T],
+        *args: Any,
+        retryable: Callable[[BaseException], bool] = is_transient,
+        **kwargs: Any,
+    ) -> T:
+        """
+        Call ``fn(*args, **kwargs)``, retrying transient failures.
+
+        Args:
+            fn: The call to make
+            retryable: Decides which exceptions are transient
+
+        Returns:
+            Whatever ``fn`` returns
+
+        Raises:
+            CircuitOpenError: If the breaker is open
+            Exception: The last error once the attempts run out, or any
+                non-transient error straight away
+        """
+        for attempt in range(1, self.attempts + 1):
+            if self.breaker is not None:
+                self.breaker.allow()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                if not retryable(exc):
+                    # the backend answered, it just said no
+                    if self.breaker is not None:
+                        self.breaker.record_success()
+                    raise
+                if self.breaker is not None:
+                    self.breaker.record_failure()
+                if attempt == self.attempts:
+                    raise
+                delay = max(self.backoff(attempt), retry_after(exc) or 0.0)
+                if delay > self.max_delay:
+                    raise
+                logger.debug("%s call failed (%s), retry %d in %.2fs", self.name, exc, attempt, delay)
+                with self._lock:
+                    self.retries += 1
+                self._sleep(delay)
+                continue
+            if self.breaker is not None:
+                self.breaker.record_success()
+            return result
+        raise AssertionError("unreachable")
+
+
+def call(retrier: Optional[Retrier], fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Call ``fn`` through ``retrier``, or directly when there is none."""
+    if retrier is None:
+        return fn(*args, **kwargs)
+    return retrier.call(fn, *args, **kwargs)
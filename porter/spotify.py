@@ -0,0 +1,190 @@
+"""
+Spotify playlist helpers for Playlist Porter.
+
+This module turns a playlist URL into a stream of track objects. The first
+page is fetched on its own so tracks can start flowing into the YouTube
+search stage right away; once the playlist total is known the remaining
+pages are fetched in parallel and yielded in playlist order. Only a few
+pages are in flight at a time, so a consumer that falls behind holds back
+the fetching instead of the whole playlist piling up in memory.
+"""
+
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from porter.retry import Retrier, call
+from porter.telemetry import TELEMETRY, response_size
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 100
+DEFAULT_PAGE_CONCURRENCY = 4
+
+# Only what the matcher reads. Full track objects carry album art, every
+# market code and external IDs, which is most of each page's bytes. The
+# wrapped object has been called both "item" and "track" by the API.
+_TRACK_FIELDS = "id,name,duration_ms,artists(name)"
+PLAYLIST_ITEM_FIELDS = f"total,offset,next,items(item({_TRACK_FIELDS}),track({_TRACK_FIELDS}))"
+ADDITIONAL_TYPES = ("track",)
+
+
+def parse_playlist_id(url: str) -> Optional[str]:
+    """
+    Extract the playlist ID from an open.spotify.com playlist URL.
+
+    Args:
+        url: Playlist URL, e.g. ``https://open.spotify.com/playlist/<id>?si=...``
+
+    Returns:
+        The playlist ID, or None if the URL is not a playlist link
+    """
+    if "playlist/" not in url:
+        return None
+    playlist_id = url.split("playlist/")[1].split("?")[0].strip("/")
+    return playlist_id or None
+
+
+def _page_entries(page: Dict[str, Any], offset: int) -> List[Tuple[int, Dict[str, Any]]]:
+    """Return ``(position, track)`` for the playable tracks on one items page."""
+    entries = []
+    for index, entry in enumerate(page.get("items") or []):
+        # the API has used both "item" and "track" for the wrapped object
+        track = (entry or {}).get("item") or (entry or {}).get("track")
+        if track and track.get("name"):
+            entries.append((offset + index, track))
+    return entries
+
+
+def _call(retry: Optional[Retrier], name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Make a Spotify API call through ``retry``, recording it in ``TELEMETRY``."""
+    with TELEMETRY.span("spotify", name) as span:
+        response = call(retry, fn, *args, **kwargs)
+        span.bytes = response_size(response)
+    return response
+
+
+def _fetch_page(
+    sp: Any, playlist_id: str, page_size: int, offset: int, retry: Optional[Retrier] = None
+) -> Dict[str, Any]:
+    """Fetch one items page, trimmed to the fields the matcher uses."""
+    return _call(
+        retry,
+        "playlist_items",
+        sp.playlist_items,
+        playlist_id,
+        fields=PLAYLIST_ITEM_FIELDS,
+        limit=page_size,
+        offset=offset,
+        additional_types=ADDITIONAL_TYPES,
+    )
+
+
+def iter_playlist_entries(
+    sp: Any,
+    playlist_id: str,
+    page_size: int = PAGE_SIZE,
+    concurrency: int = DEFAULT_PAGE_CONCURRENCY,
+    on_total: Optional[Callable[[int], None]] = None,
+    start: int = 0,
+    retry: Optional[Retrier] = None,
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Yield every track in a playlist with its position, page by page.
+
+    Args:
+        sp: Authenticated ``spotipy.Spotify`` client
+        playlist_id: Spotify playlist ID
+        page_size: Items per page (Spotify allows at most 100)
+        concurrency: Number of pages fetched at once after the first
+        on_total: Called once with the playlist's total item count as soon
+            as the first page arrives
+        start: Playlist position to start from, for resuming
+        retry: Retry policy for each page request
+
+    Yields:
+        ``(position, track)`` tuples in playlist order. Positions count
+        every playlist item, so they skip over unplayable entries.
+    """
+    first = _fetch_page(sp, playlist_id, page_size, start, retry)
+    total = first.get("total")
+    if on_total is not None and total is not None:
+        on_total(total)
+    yield from _page_entries(first, start)
+
+    if total is None:
+        # no total to plan around, so just follow the "next" links
+        page, offset = first, start
+        while page.get("next"):
+            offset += len(page.get("items") or [])
+            page = _call(retry, "next", sp.next, page)
+            yield from _page_entries(page, page.get("offset", offset))
+        return
+
+    offsets = range(start + page_size, total, page_size)
+    if not offsets:
+        return
+
+    def _fetch(offset: int) -> List[Tuple[int, Dict[str, Any]]]:
+        return _page_entries(_fetch_page(sp, playlist_id, page_size, offset, retry), offset)
+
+    logger.debug("Fetching %d more pages for playlist %s", len(offsets), playlist_id)
+    workers = max(1, concurrency)
+    remaining = iter(offsets)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sp-pages") as pool:
+        # at most ``workers`` pages in flight, in playlist order; the next one
+        # is only requested once a page is handed on, so backpressure from
+        # the consumer reaches Spotify
+        pending: Deque[Future] = deque(pool.submit(_fetch, offset) for offset in islice(remaining, workers))
+        while pending:
+            entries = pending.popleft().result()
+            for offset in islice(remaining, 1):
+                pending.append(pool.submit(_fetch, offset))
+            yield from entries
+
+
+def iter_playlist_tracks(sp: Any, playlist_id: str, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every track in a playlist, page by page.
+
+    Takes the same arguments as ``iter_playlist_entries``.
+
+    Yields:
+        Spotify track objects in playlist order
+    """
+    for _, track in iter_playlist_entries(sp, playlist_id, **kwargs):
+        yield track
+
+
+def playlist_snapshot_id(sp: Any, playlist_id: str, retry: Optional[Retrier] = None) -> Optional[str]:
+    """Return the playlist's current ``snapshot_id`` (changes on every edit)."""
+    return _call(retry, "playlist", sp.playlist, playlist_id, fields="snapshot_id").get("snapshot_id")
+
+
+def iter_user_playlists(sp: Any, page_size: int = 50, retry: Optional[Retrier] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every playlist in the current user's library.
+
+    Args:
+        sp: Authenticated ``spotipy.Spotify`` client
+        page_size: Playlists per page (Spotify allows at most 50)
+        retry: Retry policy for each page request
+
+    Yields:
+        Simplified playlist objects (``id``, ``name``, ``tracks.total``, ...)
+    """
+    page = _call(retry, "current_user_playlists", sp.current_user_playlists, limit=page_size)
+    while page:
+        for playlist in page.get("items") or []:
+            if playlist and playlist.get("id"):
+                yield playlist
+        page = _call(retry, "next", sp.next, page) if page.get("next") else None
+
+
+def track_query(track: Dict[str, Any]) -> str:
+    """Build the YouTube search query for a Spotify track ("title first-artist")."""
+    artists = track.get("artists") or []
+    artist = artists[0]["name"] if artists else ""
+    return f"{track['name']} {artist}".strip()
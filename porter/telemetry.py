@@ -0,0 +1,294 @@
+"""
+Lightweight timing telemetry for Playlist Porter.
+
+``Telemetry`` keeps, per operation and call (e.g. ``("youtube",
+"search.list")``), a call count, an error count, total seconds, bytes
+transferred and a window of recent durations for the p50/p95. Recording a
+call costs two clock reads and a short locked update, cheap enough to leave
+on in production. Percentiles are only worked out when a snapshot is taken.
+
+The package records into the process-wide ``TELEMETRY`` instance: Spotify
+page fetches, match cache and index lookups, and every YouTube request.
+``prometheus_text`` renders it in the Prometheus text format, which
+``write_prometheus`` writes to a file and ``serve_prometheus`` serves over
+HTTP for scraping.
+"""
+
+import http.server
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Recent durations kept per call for the percentiles
+DEFAULT_WINDOW = 1024
+
+QUANTILES = (0.5, 0.95)
+
+
+def response_size(response: Any) -> int:
+    """Estimate the bytes of a parsed JSON API response (0 if not JSON-like)."""
+    if not isinstance(response, (dict, list)):
+        return 0
+    try:
+        return len(json.dumps(response, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _quantile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _Metric:
+    """Counters and recent durations for one operation and call."""
+
+    __slots__ = ("count", "errors", "seconds", "bytes", "recent")
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+
+class Span:
+    """
+    Times one call; use as a context manager (see ``Telemetry.span``).
+
+    Set ``bytes`` inside the block to record the size of what was
+    transferred. An exception leaving the block counts as an error.
+    """
+
+    __slots__ = ("_telemetry", "_key", "_started", "bytes")
+
+    def __init__(self, telemetry: "Telemetry", key: Tuple[str, str]):
+        self._telemetry = telemetry
+        self._key = key
+        self._started = 0.0
+        self.bytes = 0
+
+    def __enter__(self) -> "Span":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self._telemetry._record(self._key, time.perf_counter() - self._started, self.bytes, exc_type is not None)
+
+
+class Telemetry:
+    """
+    Per-call timing counters.
+
+    The object is safe to share between threads and Streamlit sessions.
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        """
+        Initialize the counters.
+
+        Args:
+            window: Recent durations kept per call for the percentiles
+        """
+        self.window = window
+        self.started = time.time()
+        self._metrics: Dict[Tuple[str, str], _Metric] = {}
+        self._lock = threading.Lock()
+
+    def span(self, operation: str, call: str = "") -> Span:
+        """
+        Time a block of code.
+
+        Args:
+            operation: What kind of work it is, e.g. ``"youtube"``
+            call: Which call within it, e.g. ``"search.list"``
+
+        Returns:
+            A ``Span`` to use in a ``with`` statement
+        """
+        return Span(self, (operation, call))
+
+    def add_bytes(self, operation: str, call: str, nbytes: int) -> None:
+        """Add bytes to a call without counting another call."""
+        with self._lock:
+            self._metric((operation, call)).bytes += nbytes
+
+    def _metric(self, key: Tuple[str, str]) -> _Metric:
+        """Return the metric for ``key``, creating it (lock held)."""
+        metric = self._metrics.get(key)
+        if metric is None:
+            metric = self._metrics[key] = _Metric(self.window)
+        return metric
+
+    def _record(self, key: Tuple[str, str], seconds: float, nbytes: int, error: bool) -> None:
+        with self._lock:
+            metric = self._metric(key)
+            metric.count += 1
+            metric.errors += error
+            metric.seconds += seconds
+            metric.bytes += nbytes
+            metric.recent.append(seconds)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Report every call recorded so far.
+
+        Returns:
+            One dictionary per operation and call, sorted by total time
+            (largest first), with ``operation``, ``call``, ``count``,
+            ``errors``, ``total_s``, ``p50_ms``, ``p95_ms`` (over the recent
+            window) and ``bytes``
+        """
+        with self._lock:
+            items = [
+                (key, m.count, m.errors, m.seconds, m.bytes, list(m.recent)) for key, m in self._metrics.items()
+            ]
+        report = []
+        for (operation, call), count, errors, seconds, nbytes, recent in items:
+            recent.sort()
+            report.append(
+                {
+                    "operation": operation,
+                    "call": call,
+                    "count": count,
+                    "errors": errors,
+                    "total_s": round(seconds, 3),
+                    "p50_ms": round(_quantile(recent, 0.5) * 1000, 2),
+                    "p95_ms": round(_quantile(recent, 0.95) * 1000, 2),
+                    "bytes": nbytes,
+                }
+            )
+        report.sort(key=lambda row: row["total_s"], reverse=True)
+        return report
+
+    def reset(self) -> None:
+        """Forget everything recorded so far."""
+        with self._lock:
+            self._metrics.clear()
+            self.started = time.time()
+
+    def prometheus_text(self, prefix: str = "porter") -> str:
+        """
+        Render the counters in the Prometheus text exposition format.
+
+        Durations are a summary (``{prefix}_call_seconds``) with the p50
+        and p95 as quantiles; errors and bytes are counters. Every sample
+        is labelled with ``operation`` and ``call``.
+        """
+        with self._lock:
+            items = sorted(
+                (key, m.count, m.errors, m.seconds, m.bytes, list(m.recent)) for key, m in self._metrics.items()
+            )
+        name = f"{prefix}_call_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each call, including retries.",
+            f"# TYPE {name} summary",
+        ]
+        for (operation, call), count, _, seconds, _, recent in items:
+            labels = _labels(operation, call)
+            recent.sort()
+            for q in QUANTILES:
+                lines.append(f'{name}{{{labels},quantile="{q}"}} {_quantile(recent, q):.6f}')
+            lines.append(f"{name}_sum{{{labels}}} {seconds:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+        for metric, index, help_text in (
+            (f"{prefix}_call_errors_total", 2, "Calls that raised."),
+            (f"{prefix}_call_bytes_total", 4, "Response bytes received (estimated from the parsed JSON)."),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for item in items:
+                lines.append(f"{metric}{{{_labels(*item[0])}}} {item[index]}")
+        lines.append(f"# HELP {prefix}_telemetry_start_time_seconds When the counters were last reset.")
+        lines.append(f"# TYPE {prefix}_telemetry_start_time_seconds gauge")
+        lines.append(f"{prefix}_telemetry_start_time_seconds {self.started:.0f}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, prefix: str = "porter") -> None:
+        """
+        Write ``prometheus_text`` to ``path``, replacing it atomically.
+
+        Raises:
+            OSError: If the file cannot be written
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(self.prometheus_text(prefix))
+        os.replace(tmp, path)
+
+    def start_writer(self, path: str, interval: float = 15.0, prefix: str = "porter") -> threading.Thread:
+        """
+        Rewrite the Prometheus file every ``interval`` seconds from a daemon thread.
+
+        Returns:
+            The writer thread
+        """
+
+        def _loop() -> None:
+            while True:
+                try:
+                    self.write_prometheus(path, prefix)
+                except OSError as exc:
+                    logger.warning("Could not write telemetry to %s: %s", path, exc)
+                time.sleep(interval)
+
+        thread = threading.Thread(target=_loop, name="porter-telemetry-writer", daemon=True)
+        thread.start()
+        return thread
+
+    def serve_prometheus(
+        self, port: int, host: str = "0.0.0.0", prefix: str = "porter"
+    ) -> http.server.ThreadingHTTPServer:
+        """
+        Serve ``prometheus_text`` at ``/metrics`` from a daemon thread.
+
+        Returns:
+            The running server; call ``shutdown()`` to stop it
+
+        Raises:
+            OSError: If the port cannot be bound
+        """
+        telemetry = self
+
+        class _Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = telemetry.prometheus_text(prefix).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logger.debug("metrics: " + format, *args)
+
+        server = http.server.ThreadingHTTPServer((host, port), _Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="porter-telemetry-http", daemon=True).start()
+        logger.info("Serving telemetry on http://%s:%d/metrics", host, port)
+        return server
+
+
+def _labels(operation: str, call: str) -> str:
+    def _escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return f'operation="{_escape(operation)}",call="{_escape(call)}"'
+
+
+# Shared by everything in the process
+TELEMETRY = Telemetry()
@@ -0,0 +1,231 @@
+"""
+Process-wide cache of playlist track lists for Playlist Porter.
+
+A playlist's ``snapshot_id`` changes on every edit, so the track list of a
+given ``(playlist_id, snapshot_id)`` never changes. ``TrackListCache`` keeps
+those lists in memory, shared by every Streamlit session in the process,
+and evicts the least recently used ones once they outgrow a byte budget.
+
+Fetches are single-flight: the first request for a snapshot starts one
+background fetch, and every request for it (including the first) reads
+from that fetch as pages arrive. Nobody waits for the whole playlist before
+their searches can start, and concurrent sessions converting the same
+playlist cost Spotify one set of page requests.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from porter.retry import Retrier
+from porter.spotify import iter_playlist_entries
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 64 * 2**20
+
+# Rough per-track overhead of the dicts, lists and tuple that hold one entry
+_TRACK_OVERHEAD = 600
+
+Entry = Tuple[int, Dict[str, Any]]
+
+
+def _normalize(track: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only the fields the converter reads."""
+    return {
+        "id": track.get("id"),
+        "name": track.get("name"),
+        "duration_ms": track.get("duration_ms"),
+        "artists": [{"name": artist.get("name")} for artist in track.get("artists") or []],
+    }
+
+
+def _size(track: Dict[str, Any]) -> int:
+    """Estimate the memory one normalized track takes, in bytes."""
+    text = len(track["id"] or "") + len(track["name"] or "")
+    return _TRACK_OVERHEAD + text + sum(100 + len(a["name"] or "") for a in track["artists"])
+
+
+class _TrackList:
+    """One snapshot's track list, possibly still being fetched."""
+
+    def __init__(self) -> None:
+        self.entries: List[Entry] = []
+        self.total: Optional[int] = None
+        self.size = 0
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.cond = threading.Condition()
+
+    def set_total(self, total: int) -> None:
+        with self.cond:
+            self.total = total
+            self.cond.notify_all()
+
+    def add(self, position: int, track: Dict[str, Any]) -> None:
+        with self.cond:
+            self.entries.append((position, track))
+            self.size += _size(track)
+            self.cond.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        with self.cond:
+            self.done = True
+            self.error = error
+            self.cond.notify_all()
+
+    def read(self, start: int, on_total: Optional[Callable[[int], None]]) -> Iterator[Entry]:
+        """Yield the entries from position ``start`` on, waiting for the fetch as needed."""
+        index = 0
+        reported = on_total is None
+        while True:
+            with self.cond:
+                while index >= len(self.entries) and not self.done and (reported or self.total is None):
+                    self.cond.wait()
+                batch = self.entries[index:]
+                index += len(batch)
+                total, finished, error = self.total, self.done and index >= len(self.entries), self.error
+            if not reported and total is not None:
+                on_total(total)  # type: ignore[misc]
+                reported = True
+            for position, track in batch:
+                if position >= start:
+                    yield position, track
+            if finished:
+                if error is not None:
+                    raise error
+                return
+
+
+class TrackListCache:
+    """
+    LRU cache of playlist track lists keyed by ``(playlist_id, snapshot_id)``.
+
+    Cached track objects are shared between callers and must not be
+    modified. The object is safe to share between threads and Streamlit
+    sessions.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, page_concurrency: Optional[int] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Approximate memory budget for finished track lists;
+                a list larger than the whole budget is served but not kept
+            page_concurrency: Pages fetched at once per playlist (defaults
+                to ``iter_playlist_entries``'s own default)
+        """
+        self.max_bytes = max_bytes
+        self.page_concurrency = page_concurrency
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self._lists: "OrderedDict[Tuple[str, str], _TrackList]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._lists)
+
+    @property
+    def size(self) -> int:
+        """Estimated bytes held by finished track lists."""
+        with self._lock:
+            return self._bytes
+
+    def entries(
+        self,
+        sp: Any,
+        playlist_id: str,
+        snapshot_id: Optional[str],
+        start: int = 0,
+        on_total: Optional[Callable[[int], None]] = None,
+        retry: Optional[Retrier] = None,
+        concurrency: Optional[int] = None,
+    ) -> Iterator[Entry]:
+        """
+        Iterate over a playlist's ``(position, track)`` entries, from cache if possible.
+
+        Takes the same arguments as ``porter.spotify.iter_playlist_entries``
+        plus the playlist's current ``snapshot_id``. Without a snapshot ID
+        nothing can be cached, so the playlist is fetched directly.
+        ``concurrency`` only applies if this call starts the fetch; it
+        defaults to the cache's ``page_concurrency``.
+
+        Raises:
+            Exception: Whatever the fetch raised, after the entries that did
+                arrive; the failed list is dropped so the next call retries
+        """
+        concurrency = concurrency or self.page_concurrency
+        if snapshot_id is None:
+            kwargs = {"concurrency": concurrency} if concurrency else {}
+            return iter_playlist_entries(sp, playlist_id, on_total=on_total, start=start, retry=retry, **kwargs)
+
+        key = (playlist_id, snapshot_id)
+        with self._lock:
+            tracklist = self._lists.get(key)
+            if tracklist is None:
+                self.misses += 1
+                tracklist = self._lists[key] = _TrackList()
+                fetch = True
+            else:
+                if tracklist.done:
+                    self.hits += 1
+                else:
+                    self.shared += 1
+                self._lists.move_to_end(key)
+                fetch = False
+        if fetch:
+            threading.Thread(
+                target=self._fetch,
+                args=(key, tracklist, sp, retry, concurrency),
+                name=f"porter-tracklist-{playlist_id}",
+                daemon=True,
+            ).start()
+        return tracklist.read(start, on_total)
+
+    def _fetch(
+        self,
+        key: Tuple[str, str],
+        tracklist: _TrackList,
+        sp: Any,
+        retry: Optional[Retrier],
+        concurrency: Optional[int],
+    ) -> None:
+        playlist_id = key[0]
+        kwargs = {"concurrency": concurrency} if concurrency else {}
+        try:
+            entries = iter_playlist_entries(sp, playlist_id, on_total=tracklist.set_total, retry=retry, **kwargs)
+            for position, track in entries:
+                tracklist.add(position, _normalize(track))
+        except BaseException as exc:
+            logger.debug("Fetching playlist %s failed: %s", playlist_id, exc)
+            with self._lock:
+                if self._lists.get(key) is tracklist:
+                    del self._lists[key]
+            tracklist.finish(exc)
+            return
+
+        tracklist.finish()
+        with self._lock:
+            if self._lists.get(key) is not tracklist:
+                return
+            if tracklist.size > self.max_bytes:
+                logger.debug("Playlist %s is larger than the whole cache, not keeping it", playlist_id)
+                del self._lists[key]
+                return
+            self._bytes += tracklist.size
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used finished lists until the budget is met (lock held)."""
+        for key in list(self._lists):
+            if self._bytes <= self.max_bytes:
+                break
+            tracklist = self._lists[key]
+            if tracklist.done:
+                del self._lists[key]
+                self._bytes -= tracklist.size
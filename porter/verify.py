@@ -0,0 +1,140 @@
+"""
+Duration check for YouTube matches.
+
+The top search hit is sometimes the wrong video: a live version, an
+extended mix or a ten-hour loop. Rather than paying for another 100-unit
+search, the converter asks for the top few candidates in the original
+search, fetches their durations with ``videos.list`` (1 unit for up to 50
+IDs) and picks the best-ranked candidate whose length matches the Spotify
+track.
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from porter.retry import Retrier
+from porter.youtube import MAX_BATCH_SIZE, execute, execute_batch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CANDIDATES = 5
+
+# Most IDs one videos.list call accepts
+MAX_IDS_PER_CALL = 50
+
+# A candidate matches if its length is within this many seconds, or this
+# fraction of the track length, whichever is larger
+DEFAULT_TOLERANCE_SECONDS = 10
+DEFAULT_TOLERANCE_RATIO = 0.1
+
+_ISO_DURATION = re.compile(
+    r"^P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+
+
+def parse_duration(value: str) -> Optional[int]:
+    """
+    Convert an ISO 8601 duration such as ``PT4M13S`` to seconds.
+
+    Returns:
+        The duration in seconds, or None if the value can't be parsed
+    """
+    match = _ISO_DURATION.match(value or "")
+    if not match:
+        return None
+    parts = {k: int(v) for k, v in match.groupdict().items() if v}
+    return (
+        parts.get("days", 0) * 86400
+        + parts.get("hours", 0) * 3600
+        + parts.get("minutes", 0) * 60
+        + parts.get("seconds", 0)
+    )
+
+
+def videos_request(youtube: Any, video_ids: Sequence[str]) -> Any:
+    """Build the ``videos.list`` request for the durations of up to 50 videos."""
+    return youtube.videos().list(part="contentDetails", id=",".join(video_ids), maxResults=MAX_IDS_PER_CALL)
+
+
+def calls_needed(video_ids: Sequence[str]) -> int:
+    """Number of ``videos.list`` calls ``fetch_durations`` will make for these IDs."""
+    return -(-len(set(video_ids)) // MAX_IDS_PER_CALL)
+
+
+def fetch_durations(
+    youtube: Any, video_ids: Sequence[str], http: Any = None, retry: Optional[Retrier] = None
+) -> Dict[str, int]:
+    """
+    Look up video durations, 50 IDs per ``videos.list`` call.
+
+    More than one call's worth of IDs goes out as a single batch request.
+
+    Args:
+        youtube: YouTube Data API resource
+        video_ids: Video IDs to look up (duplicates are ignored)
+        http: Optional transport to execute the requests with
+        retry: Retry policy for the requests
+
+    Returns:
+        Video ID -> duration in seconds, for the videos YouTube returned
+    """
+    ids = list(dict.fromkeys(video_ids))
+    if not ids:
+        return {}
+    requests = [
+        videos_request(youtube, ids[start:start + MAX_IDS_PER_CALL])
+        for start in range(0, len(ids), MAX_IDS_PER_CALL)
+    ]
+    if len(requests) == 1:
+        responses: List[Any] = [execute(requests[0], http, retry)]
+    else:
+        responses = []
+        for start in range(0, len(requests), MAX_BATCH_SIZE):
+            responses.extend(execute_batch(youtube, requests[start:start + MAX_BATCH_SIZE], http, retry))
+
+    durations: Dict[str, int] = {}
+    for resp in responses:
+        if isinstance(resp, Exception):
+            logger.debug("videos.list lookup failed: %s", resp)
+            continue
+        for item in resp.get("items") or []:
+            seconds = parse_duration((item.get("contentDetails") or {}).get("duration", ""))
+            if seconds is not None:
+                durations[item["id"]] = seconds
+    return durations
+
+
+def pick_candidate(
+    candidates: Sequence[str],
+    durations: Dict[str, int],
+    duration_ms: Optional[int],
+    tolerance_seconds: float = DEFAULT_TOLERANCE_SECONDS,
+    tolerance_ratio: float = DEFAULT_TOLERANCE_RATIO,
+) -> Optional[str]:
+    """
+    Choose the best candidate for a track given the candidates' durations.
+
+    The best-ranked candidate within tolerance wins. If none is within
+    tolerance, the one closest in length is used. Without a track length or
+    any known durations, the top search hit is kept.
+
+    Args:
+        candidates: Video IDs in search rank order
+        durations: Video ID -> duration in seconds
+        duration_ms: Spotify track length in milliseconds
+
+    Returns:
+        The chosen video ID, or None if there were no candidates
+    """
+    if not candidates:
+        return None
+    known = [c for c in candidates if c in durations]
+    if not duration_ms or not known:
+        return candidates[0]
+    target = duration_ms / 1000
+    tolerance = max(tolerance_seconds, target * tolerance_ratio)
+    for candidate in known:
+        if abs(durations[candidate] - target) <= tolerance:
+            return candidate
+    return min(known, key=lambda c: abs(durations[c] - target))
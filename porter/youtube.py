@@ -0,0 +1,155 @@
+"""
+YouTube search helpers for Playlist Porter.
+
+This module wraps the YouTube Data API ``search.list`` call used by the
+converter. Requests are grouped into multipart batch requests, which share
+one connection and one HTTP round trip; parts that fail inside a batch are
+retried alone.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+from porter.retry import Retrier, is_transient
+from porter.telemetry import TELEMETRY, response_size
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 8
+WATCH_URL = "https://www.youtube.com/watch?v={}"
+NOT_FOUND = "Not found"
+
+# Most calls the YouTube batch endpoint accepts in one multipart request
+MAX_BATCH_SIZE = 50
+
+
+def execute(request: Any, http: Any = None, retry: Optional[Retrier] = None) -> Dict[str, Any]:
+    """Execute a prepared API request, on ``http`` if one is given, retrying transient errors."""
+    kwargs = {"http": http} if http is not None else {}
+    with TELEMETRY.span("youtube", _method(request)) as span:
+        if retry is None:
+            response = request.execute(**kwargs)
+        else:
+            response = retry.call(request.execute, retryable=is_retryable, **kwargs)
+        span.bytes = response_size(response)
+    return response
+
+
+def _method(request: Any) -> str:
+    """Name the API method of a prepared request, e.g. ``"search.list"``; batches are ``"batch"``."""
+    method_id = getattr(request, "methodId", None)
+    return method_id.split(".", 1)[-1] if method_id else "batch"
+
+
+def search_request(youtube: Any, query: str, max_results: int = 1) -> Any:
+    """Build the ``search.list`` request for the top videos matching ``query``."""
+    return youtube.search().list(q=query, part="snippet", maxResults=max_results, type="video")
+
+
+def video_ids(resp: Dict[str, Any]) -> List[str]:
+    """Return the video IDs in a search response, in rank order."""
+    return [item["id"]["videoId"] for item in resp.get("items") or [] if item.get("id", {}).get("videoId")]
+
+
+def execute_batch(
+    youtube: Any, requests: Sequence[Any], http: Any = None, retry: Optional[Retrier] = None
+) -> List[Any]:
+    """
+    Execute several prepared requests as one multipart batch request.
+
+    Parts that fail inside the batch are retried once as single requests,
+    except for quota errors, which would only fail again.
+
+    Args:
+        youtube: YouTube Data API resource the requests were built from
+        requests: Up to ``MAX_BATCH_SIZE`` prepared requests
+        http: Optional transport to execute the batch with
+        retry: Retry policy for the batch round trip and the single retries
+
+    Returns:
+        One entry per request, in order: the response dictionary, or the
+        exception raised if the part failed both in the batch and alone
+    """
+    if len(requests) > MAX_BATCH_SIZE:
+        raise ValueError(f"A batch holds at most {MAX_BATCH_SIZE} requests, got {len(requests)}")
+    if len(requests) == 1:
+        try:
+            return [execute(requests[0], http, retry)]
+        except Exception as exc:
+            return [exc]
+
+    results: List[Any] = [None] * len(requests)
+
+    def _callback(request_id: str, response: Any, exception: Optional[Exception]) -> None:
+        results[int(request_id)] = exception if exception is not None else response
+
+    batch = youtube.new_batch_http_request(callback=_callback)
+    for index, request in enumerate(requests):
+        batch.add(request, request_id=str(index))
+    execute(batch, http, retry)
+    TELEMETRY.add_bytes("youtube", "batch", sum(response_size(r) for r in results))
+
+    for index, result in enumerate(results):
+        if isinstance(result, Exception) and not is_quota_error(result):
+            logger.debug("Batch part %d failed (%s), retrying it alone", index, result)
+            try:
+                results[index] = execute(requests[index], http, retry)
+            except Exception as exc:
+                results[index] = exc
+    return results
+
+
+def search_batch(
+    youtube: Any,
+    queries: Sequence[str],
+    http: Any = None,
+    max_results: int = 1,
+    retry: Optional[Retrier] = None,
+) -> List[Any]:
+    """
+    Search for several queries in one batch request.
+
+    A single query is sent as a plain request.
+
+    Args:
+        youtube: YouTube Data API resource
+        queries: Up to ``MAX_BATCH_SIZE`` search queries
+        http: Optional transport to execute the batch with
+        max_results: Candidates to ask for per query; the quota cost is
+            the same however many come back
+        retry: Retry policy for the requests
+
+    Returns:
+        One entry per query, in order: the list of candidate video IDs in
+        rank order (empty when the search found nothing), or the exception
+        if that search failed
+    """
+    requests = [search_request(youtube, q, max_results) for q in queries]
+    responses = execute_batch(youtube, requests, http, retry)
+    return [r if isinstance(r, Exception) else video_ids(r) for r in responses]
+
+
+def is_quota_error(exc: BaseException) -> bool:
+    """
+    Return True if ``exc`` is the API telling us the key is out of quota.
+
+    Works on ``googleapiclient.errors.HttpError`` without importing it, by
+    looking at the response status and the error reason in the body.
+    """
+    resp = getattr(exc, "resp", None)
+    if getattr(resp, "status", None) not in (403, 429):
+        return False
+    content = getattr(exc, "content", b"") or b""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", "replace")
+    return "quotaExceeded" in content or "dailyLimitExceeded" in content
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Return True for transient errors; quota errors are never retried."""
+    return is_transient(exc) and not is_quota_error(exc)
+
+
+def watch_url(video_id: Optional[str]) -> str:
+    """Return the watch link for a video ID, or the "Not found" marker."""
+    return WATCH_URL.format(video_id) if video_id else NOT_FOUND